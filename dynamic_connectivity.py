@@ -4,24 +4,25 @@
 #  Streamlined : Dynamic Graphs II
 #              - Demaine (MIT 6.851 Advanced Data Structures)
 
-class AVLTree():
+# Sequence tree nodes (keyed by position) with subtree sizes & annotation flags.
+# They are the interchangeable backends of 'EulerTourForest', the backend interface is
+# -> 'merge(left, mid, right)' & 'split(mid)', implemented by every backend
+# -> 'root(node)', 'first(tree)', 'size(tree)', 'set_annotation(flag)' & 'annotated_nodes()'
+# Everything else is built on top of these.
+class SequenceTree():
+    # Fixed attribute slots instead of a per-node '__dict__', Euler tour forests hold many nodes
+    __slots__ = ('value', 'id', '_left', '_right', '_parent', '_size',\
+        '_annotation', '_subtree_annotation')
     total_nodes = 0
 
-    def __init__(self, value, left=None, right=None):
+    def __init__(self, value):
         self.value = value
-        self.id = AVLTree.total_nodes
-        AVLTree.total_nodes += 1
+        self.id = SequenceTree.total_nodes
+        SequenceTree.total_nodes += 1
         self._left = self._right = self._parent = None
-        self._height = 1
         self._size = 1
         self._annotation = False
         self._subtree_annotation = False
-        self._link_left(left)
-        self._link_right(right)
-
-    @staticmethod
-    def height(tree):
-        return 0 if tree is None else tree._height
 
     @staticmethod
     def size(tree):
@@ -32,8 +33,10 @@ class AVLTree():
         return False if tree is None else tree._subtree_annotation
 
     def _update_subtree_annotation(self):
+        left, right = self._left, self._right
         self._subtree_annotation = self._annotation or\
-            any(map(AVLTree.subtree_annotation, [self._left, self._right]))
+            (left is not None and left._subtree_annotation) or\
+            (right is not None and right._subtree_annotation)
         return self
 
     def set_annotation(self, flag):
@@ -41,20 +44,203 @@ class AVLTree():
         self._annotation = flag
         cur_node = self
         while cur_node is not None:
+            subtree_annotation = cur_node._subtree_annotation
             cur_node._update_subtree_annotation()
+            # ancestors are unaffected once a subtree flag stays the same
+            if cur_node._subtree_annotation == subtree_annotation: break
             cur_node = cur_node._parent
 
-    def annotated_nodes(self, result=None):
-        if result is None: result = []
-        if AVLTree.subtree_annotation(self._left): self._left.annotated_nodes(result)
-        if self._annotation: result.append(self)
-        if AVLTree.subtree_annotation(self._right): self._right.annotated_nodes(result)
-        return result
+    # Lazily yields the annotated nodes in sequence order with an explicit stack.
+    # Flags are re-read when a subtree is entered & before a node is yielded,
+    # so nodes unannotated during the walk are skipped.
+    # The shape of the tree must not change while the walk is in progress.
+    def annotated_nodes(self):
+        stack, node = [], self
+        while True:
+            while node is not None and node._subtree_annotation:
+                stack.append(node)
+                node = node._left
+            if not stack: return
+            node = stack.pop()
+            if node._annotation: yield node
+            node = node._right
 
     def _update_stats(self):
-        self._height = 1 + max(map(AVLTree.height, [self._left, self._right]))
-        self._size = 1 + sum(map(AVLTree.size, [self._left, self._right]))
-        return self._update_subtree_annotation()
+        left, right = self._left, self._right
+        size, annotation = 1, self._annotation
+        if left is not None:
+            size += left._size
+            annotation = annotation or left._subtree_annotation
+        if right is not None:
+            size += right._size
+            annotation = annotation or right._subtree_annotation
+        self._size, self._subtree_annotation = size, annotation
+        return self
+
+    # Rotations relink the parent of the rotated subtree in place & return the new subtree root
+    def _rotate_right(self):
+        child, parent = self._left, self._parent
+        self._left = child._right
+        if child._right is not None: child._right._parent = self
+        child._right, self._parent, child._parent = self, child, parent
+        if parent is not None:
+            if parent._left is self: parent._left = child
+            else: parent._right = child
+        self._update_stats()
+        return child._update_stats()
+
+    def _rotate_left(self):
+        child, parent = self._right, self._parent
+        self._right = child._left
+        if child._left is not None: child._left._parent = self
+        child._left, self._parent, child._parent = self, child, parent
+        if parent is not None:
+            if parent._left is self: parent._left = child
+            else: parent._right = child
+        self._update_stats()
+        return child._update_stats()
+
+    @staticmethod
+    def root(node):
+        while node._parent is not None: node = node._parent
+        return node
+
+    @staticmethod
+    def first(tree):
+        while tree._left is not None: tree = tree._left
+        return tree
+
+    # Backends may restructure the tree in 'root', the second lookup then ends near the first root
+    @classmethod
+    def same_tree(cls, u, v):
+        u_root = cls.root(u)
+        v_root = cls.root(v)
+        return SequenceTree.root(u_root) is v_root
+
+    @staticmethod
+    def last(tree):
+        while tree._right is not None: tree = tree._right
+        return tree
+
+    @classmethod
+    def push_front(cls, node, tree):
+        return cls.merge(None, node, tree)
+
+    @classmethod
+    def push_back(cls, tree, node):
+        return cls.merge(tree, node, None)
+
+    @classmethod
+    def pop_front(cls, tree):
+        assert tree is not None
+        return cls.split(cls.first(tree))[1:]
+
+    @classmethod
+    def pop_back(cls, tree):
+        assert tree is not None
+        return cls.split(cls.last(tree))[:2]
+
+    @staticmethod
+    def get(tree, index):
+        if tree is None or index < 0: return None
+        lsize = SequenceTree.size(tree._left)
+        if lsize > index: return SequenceTree.get(tree._left, index)
+        if lsize == index: return tree
+        return SequenceTree.get(tree._right, index - (1+lsize))
+
+    @staticmethod
+    def inorder(tree, traversal=None):
+        if traversal is None: traversal = []
+        if tree is not None:
+            SequenceTree.inorder(tree._left, traversal)
+            traversal.append(tree.value)
+            SequenceTree.inorder(tree._right, traversal)
+        return traversal
+
+    # Balanced tree over the detached 'nodes' in their order, each node is visited once
+    # & its stats are refreshed after those of its children, O(n) in total
+    @classmethod
+    def from_sequence(cls, nodes):
+        def build(lo, hi):
+            if lo >= hi: return None
+            mid = (lo + hi) >> 1
+            node = nodes[mid]
+            node._left, node._right = build(lo, mid), build(1+mid, hi)
+            if node._left is not None: node._left._parent = node
+            if node._right is not None: node._right._parent = node
+            return node._update_stats()
+
+        root = build(0, len(nodes))
+        if root is not None: root._parent = None
+        return root
+
+    # Subclass of the backend 'cls' whose nodes also keep, for their subtree,
+    # -> the minimum rank, vertex nodes are ranked by their vertex id & edge nodes are unranked
+    # -> the aggregate of the node weights under the associative 'combine', None counts as empty
+    # Both follow the sizes through every rotation, merge & split via '_update_stats'.
+    @classmethod
+    def with_aggregates(cls, combine=None):
+        unranked, update_stats = float('inf'), cls._update_stats
+
+        class AggregateTree(cls):
+            __slots__ = ('_rank', '_min_rank', '_weight', '_aggregate')
+
+            def __init__(self, value, *args):
+                self._rank = self._min_rank = unranked
+                self._weight = self._aggregate = None
+                super().__init__(value, *args)
+
+            def _update_stats(self):
+                update_stats(self)
+                left, right = self._left, self._right
+                rank, weight = self._rank, self._weight
+                if left is not None:
+                    if left._min_rank < rank: rank = left._min_rank
+                    if combine is not None and left._aggregate is not None:
+                        weight = left._aggregate if weight is None else combine(left._aggregate, weight)
+                if right is not None:
+                    if right._min_rank < rank: rank = right._min_rank
+                    if combine is not None and right._aggregate is not None:
+                        weight = right._aggregate if weight is None else combine(weight, right._aggregate)
+                self._min_rank, self._aggregate = rank, weight
+                return self
+
+            def set_weight(self, weight):
+                self._weight = weight
+                node = self
+                while node is not None:
+                    node._update_stats()
+                    node = node._parent
+
+        AggregateTree.__name__ = cls.__name__
+        return AggregateTree
+
+class AVLTree(SequenceTree):
+    __slots__ = ('_height',)
+
+    def __init__(self, value, left=None, right=None):
+        super().__init__(value)
+        self._height = 1
+        # a fresh node already holds the stats of a single node
+        if left is not None: self._link_left(left)
+        if right is not None: self._link_right(right)
+
+    @staticmethod
+    def height(tree):
+        return 0 if tree is None else tree._height
+
+    def _update_stats(self):
+        left, right = self._left, self._right
+        height, size, annotation = 1, 1, self._annotation
+        if left is not None:
+            height, size = 1 + left._height, 1 + left._size
+            annotation = annotation or left._subtree_annotation
+        if right is not None:
+            if right._height >= height: height = 1 + right._height
+            size += right._size
+            annotation = annotation or right._subtree_annotation
+        self._height, self._size, self._subtree_annotation = height, size, annotation
+        return self
 
     @staticmethod
     def balance_factor(tree):
@@ -91,103 +277,73 @@ class AVLTree():
             node._parent = None
         return node
 
-    def _rotateR(self):
-        child = self._left
-        self._link_left(child._right)
-        child._link_right(self)
-        self._update_stats()
-        child._update_stats()
-        return child
-
-    def _rotateL(self):
-        child = self._right
-        self._link_right(child._left)
-        child._link_left(self)
-        self._update_stats()
-        child._update_stats()
-        return child
-
+    # Walks up from 'node' to the root, refreshing stats & restoring balance, returns the root
     @staticmethod
-    def _merge_left(left, mid, right):
-        if AVLTree.height(left) > AVLTree.height(right) + 1:
-            left._link_right(AVLTree._merge_left(left._right, mid, right))
-            if AVLTree.balance_factor(left) < -1:
-                if AVLTree.balance_factor(left._right) < 0: return left._rotateL()
-                return left._link_right(left._right._rotateR())._rotateL()
-            return left
-        return mid._link_left(left)._link_right(right)
-
+    def _rebalance_up(node):
+        while True:
+            node._update_stats()
+            left, right = node._left, node._right
+            balance = (0 if left is None else left._height) - (0 if right is None else right._height)
+            if balance > 1:
+                if AVLTree.balance_factor(left) < 0: left._rotate_left()
+                node = node._rotate_right()
+            elif balance < -1:
+                if AVLTree.balance_factor(right) > 0: right._rotate_right()
+                node = node._rotate_left()
+            if node._parent is None: return node
+            node = node._parent
+
+    # Joins the root trees 'left' & 'right' with the detached node 'mid' in between.
+    # 'mid' is hung from the spine of the taller tree at the height of the shorter one,
+    # the spine is then repaired bottom-up with at most one (double) rotation.
     @staticmethod
-    def _merge_right(left, mid, right):
-        if AVLTree.height(right) > AVLTree.height(left) + 1:
-            right._link_left(AVLTree._merge_right(left, mid, right._left))
-            if AVLTree.balance_factor(right) > 1:
-                if AVLTree.balance_factor(right._left) > 0: return right._rotateR()
-                return right._link_left(right._left._rotateL())._rotateR()
-            return right
-        return mid._link_left(left)._link_right(right)
+    def _join(left, mid, right):
+        left_height = 0 if left is None else left._height
+        right_height = 0 if right is None else right._height
+        if left_height > right_height + 1:
+            parent, child = None, left
+            while child is not None and child._height > right_height + 1:
+                parent, child = child, child._right
+            parent._right, mid._parent = mid, parent
+        elif right_height > left_height + 1:
+            parent, child = None, right
+            while child is not None and child._height > left_height + 1:
+                parent, child = child, child._left
+            parent._left, mid._parent = mid, parent
+        else: parent = None
+        if parent is None: mid._left, mid._right = left, right
+        elif parent._right is mid: mid._left, mid._right, left = child, right, child
+        else: mid._left, mid._right, right = left, child, child
+        if left is not None: left._parent = mid
+        if right is not None: right._parent = mid
+        if parent is None: return mid._update_stats()
+        return AVLTree._rebalance_up(mid)
 
     @staticmethod
     def merge(left, mid, right):
-        mid._link_left(None)._link_right(None)
-        if AVLTree.height(left) > AVLTree.height(right) + 1:
-            return AVLTree._cut_parent(AVLTree._merge_left(left, mid, right))
-        if AVLTree.height(right) > AVLTree.height(left) + 1:
-            return AVLTree._cut_parent(AVLTree._merge_right(left, mid, right))
-        return mid._link_left(left)._link_right(right)
-
-    @staticmethod
-    def push_front(node, tree):
-        return AVLTree.merge(None, node, tree)
-
-    @staticmethod
-    def push_back(tree, node):
-        return AVLTree.merge(tree, node, None)
+        if mid._left is not None or mid._right is not None: mid._link_left(None)._link_right(None)
+        return AVLTree._join(AVLTree._cut_parent(left), mid, AVLTree._cut_parent(right))
 
+    # Walks up from 'mid', joining every ancestor & its other subtree onto the left or right part
     @staticmethod
     def split(mid):
         if mid is None: return None, None, None
-        cur_mid, ancestor_splits = mid, []
-        while cur_mid._parent is not None:
-            cur_mid, cut_left = cur_mid._parent, (cur_mid != cur_mid._parent._left)
-            ancestor_splits.append((cur_mid, cut_left))
-        [node, left, right] = map(AVLTree._cut_parent, [mid, mid._left, mid._right])
-        for (cur_mid, cut_left) in ancestor_splits:
-            AVLTree._cut_parent(cur_mid)
-            if cut_left: left = AVLTree.merge(AVLTree._cut_parent(cur_mid._left), cur_mid, left)
-            else: right = AVLTree.merge(right, cur_mid, AVLTree._cut_parent(cur_mid._right))
-        return left, node, right
-
-    @staticmethod
-    def pop_front(tree):
-        assert tree is not None
-        leftmost = tree
-        while leftmost._left is not None: leftmost = leftmost._left
-        return AVLTree.split(leftmost)[1:]
-
-    @staticmethod
-    def pop_back(tree):
-        assert tree is not None
-        rightmost = tree
-        while rightmost._right is not None: rightmost = rightmost._right
-        return AVLTree.split(rightmost)[:2]
-
-    @staticmethod
-    def get(tree, index):
-        if tree is None or index < 0: return None
-        lsize = AVLTree.size(tree._left)
-        if lsize > index: return AVLTree.get(tree._left, index)
-        if lsize == index: return tree
-        return AVLTree.get(tree._right, index - (1+lsize))
-
-    @staticmethod
-    def inorder(tree, traversal=None):
-        if traversal is None: traversal = []
-        if tree is not None:
-            AVLTree.inorder(tree._left, traversal)
-            traversal.append(tree.value)
-            AVLTree.inorder(tree._right, traversal)
-        return traversal
+        left, right, parent = mid._left, mid._right, mid._parent
+        is_left_child = parent is not None and parent._left is mid
+        if left is not None: left._parent = None
+        if right is not None: right._parent = None
+        mid._left = mid._right = mid._parent = None
+        mid._update_stats()
+        while parent is not None:
+            grandparent = parent._parent
+            is_left_parent = grandparent is not None and grandparent._left is parent
+            subtree = parent._right if is_left_child else parent._left
+            if subtree is not None: subtree._parent = None
+            parent._left = parent._right = parent._parent = None
+            if is_left_child: right = AVLTree._join(right, parent, subtree)
+            else: left = AVLTree._join(subtree, parent, left)
+            parent, is_left_child = grandparent, is_left_parent
+        return left, mid, right
 
     @staticmethod
     def render(node, offset=None):
@@ -211,6 +367,146 @@ class AVLTree():
             print(offset, 'right subtree')
             AVLTree.render(node._right, offset + '  ')
 
+# [ Reference ]
+#  Publication : Randomized Search Trees
+#              - Aragon & Seidel
+
+# Sequence tree kept in heap order of random priorities, expected depth O(log n)
+# -> split raises 'mid' to the root by rotations, as if its priority were infinite
+# -> merge puts 'mid' on top of both trees & sifts it down by rotations
+class Treap(SequenceTree):
+    __slots__ = ('_priority',)
+
+    def __init__(self, value):
+        from random import random
+
+        super().__init__(value)
+        self._priority = random()
+
+    @staticmethod
+    def merge(left, mid, right):
+        mid._left, mid._right = left, right
+        if left is not None: left._parent = mid
+        if right is not None: right._parent = mid
+        mid._update_stats()
+        root = None
+        while True:
+            left, right = mid._left, mid._right
+            if left is not None and left._priority > mid._priority and\
+                (right is None or left._priority > right._priority): top = mid._rotate_right()
+            elif right is not None and right._priority > mid._priority: top = mid._rotate_left()
+            else: break
+            if root is None: root = top
+        return mid if root is None else root
+
+    # Cartesian tree of the priorities, with the right spine kept on a stack, O(n) in total
+    @classmethod
+    def from_sequence(cls, nodes):
+        spine = []
+        for node in nodes:
+            last = None
+            while spine and spine[-1]._priority < node._priority: last = spine.pop()._update_stats()
+            node._left, node._right, node._parent = last, None, None
+            if last is not None: last._parent = node
+            if spine:
+                spine[-1]._right = node
+                node._parent = spine[-1]
+            spine.append(node)
+        while spine: root = spine.pop()._update_stats()
+        return root if nodes else None
+
+    @staticmethod
+    def split(mid):
+        if mid is None: return None, None, None
+        while mid._parent is not None:
+            if mid._parent._left is mid: mid._parent._rotate_right()
+            else: mid._parent._rotate_left()
+        left, right = mid._left, mid._right
+        if left is not None: left._parent = None
+        if right is not None: right._parent = None
+        mid._left = mid._right = None
+        return left, mid._update_stats(), right
+
+# [ Reference ]
+#  Publication : Self-Adjusting Binary Search Trees
+#              - Sleator & Tarjan
+
+# Sequence tree which rotates every accessed node to the root, O(log n) amortized.
+# Repeatedly queried vertices stay close to the root.
+class SplayTree(SequenceTree):
+    __slots__ = ()
+
+    def _splay(self):
+        while self._parent is not None:
+            parent, grandparent = self._parent, self._parent._parent
+            if grandparent is not None:
+                # zig-zig rotates the grandparent first, zig-zag rotates the parent first
+                if (grandparent._left is parent) == (parent._left is self):
+                    if grandparent._left is parent: grandparent._rotate_right()
+                    else: grandparent._rotate_left()
+                else:
+                    if parent._left is self: parent._rotate_right()
+                    else: parent._rotate_left()
+                    parent = self._parent
+            if parent._left is self: parent._rotate_right()
+            else: parent._rotate_left()
+        return self
+
+    # First annotated node of the subtree 'tree' in sequence order
+    @staticmethod
+    def _first_annotated(tree):
+        if tree is None or not tree._subtree_annotation: return None
+        while True:
+            left = tree._left
+            if left is not None and left._subtree_annotation: tree = left
+            elif tree._annotation: return tree
+            else: tree = tree._right
+
+    # Queries made during a walk splay nodes, so every step resumes from the last yielded node
+    # through the parent links, relying only on the sequence order that rotations preserve.
+    def annotated_nodes(self):
+        node = SplayTree._first_annotated(self)
+        while node is not None:
+            yield node
+            next_node = SplayTree._first_annotated(node._right)
+            while next_node is None and node._parent is not None:
+                parent = node._parent
+                if parent._left is node:
+                    if parent._annotation: next_node = parent
+                    else: next_node = SplayTree._first_annotated(parent._right)
+                node = parent
+            node = next_node
+
+    def set_annotation(self, flag):
+        self._splay()
+        self._annotation = flag
+        self._update_stats()
+
+    @staticmethod
+    def root(node):
+        return node._splay()
+
+    @staticmethod
+    def first(tree):
+        return SequenceTree.first(tree)._splay()
+
+    @staticmethod
+    def merge(left, mid, right):
+        mid._left, mid._right = left, right
+        if left is not None: left._parent = mid
+        if right is not None: right._parent = mid
+        return mid._update_stats()
+
+    @staticmethod
+    def split(mid):
+        if mid is None: return None, None, None
+        mid._splay()
+        left, right = mid._left, mid._right
+        if left is not None: left._parent = None
+        if right is not None: right._parent = None
+        mid._left = mid._right = None
+        return left, mid._update_stats(), right
+
 def run_avl_tree_tests():
     from random import choice, randrange
 
@@ -279,101 +575,222 @@ def run_avl_tree_tests():
         tree_list = tree_list[:i] + [left, right] + tree_list[i+1:]
     assert list(map(lambda t: t.value, tree_list)) == list(range(l))
 
+    for l in [0, 1, 2, 3, 1<<4, 1000]:
+        tree = AVLTree.from_sequence(list(map(lambda v: AVLTree(v), range(l))))
+        validate_structure(tree)
+        assert AVLTree.inorder(tree) == list(range(l))
+
     print('AVL Tree tests finished!')
 
 
+# Euler tours are held in sequence trees of the 'tree' backend class.
+# Vertex labels are interned to dense ids on first use, vertex nodes live in a flat list
+# indexed by id & edge nodes in a dict keyed by the packed id pair 'u << 32 | v'.
+# Queries therefore allocate no tuples, node values are only read back for reporting.
+# With 'components' (implied by 'aggregate') the forest also answers component ids, members &
+# aggregates of vertex weights under 'aggregate', an associative function like 'operator.add'.
 class EulerTourForest():
-    def __init__(self):
-        self._edge_map = dict()
-
-    def _insert_node(self, v):
-        if (v, v) not in self._edge_map:
-            self._edge_map[v, v] = AVLTree((v, v))
-
-    def _get_avl_root(self, u, v):
-        if (u, v) not in self._edge_map: return None
-        current_node = self._edge_map[u, v]
-        while current_node._parent is not None: current_node = current_node._parent
-        return current_node
+    def __init__(self, tree=None, components=False, aggregate=None):
+        self._tree = AVLTree if tree is None else tree
+        self._components = components or aggregate is not None
+        if self._components: self._tree = self._tree.with_aggregates(aggregate)
+        self._vertex_ids = dict()
+        self._vertex_nodes = []
+        self._edge_nodes = dict()
+
+    def _vertex_id(self, v):
+        vertex_id = self._vertex_ids.get(v)
+        if vertex_id is None:
+            vertex_id = self._vertex_ids[v] = len(self._vertex_nodes)
+            node = self._tree((v, v))
+            if self._components: node._rank = node._min_rank = vertex_id
+            self._vertex_nodes.append(node)
+        return vertex_id
+
+    def add_vertex(self, u):
+        if u in self._vertex_ids: return False
+        self._vertex_id(u)
+        return True
+
+    # The earliest added vertex of the component, stable while the component keeps its vertices
+    def component_id(self, u):
+        node = self._vertex_node(u)
+        if node is None: return u
+        return self._vertex_nodes[self._tree.root(node)._min_rank].value[0]
+
+    def members(self, u):
+        node = self._vertex_node(u)
+        if node is None:
+            yield u
+            return
+        stack, node = [], self._tree.root(node)
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            node = stack.pop()
+            if node.value[0] == node.value[1]: yield node.value[0]
+            node = node._right
+
+    def set_weight(self, u, weight):
+        self._vertex_nodes[self._vertex_id(u)].set_weight(weight)
+
+    def weight(self, u):
+        node = self._vertex_node(u)
+        return None if node is None else node._weight
+
+    def aggregate(self, u):
+        node = self._vertex_node(u)
+        return None if node is None else self._tree.root(node)._aggregate
+
+    # First vertex of the tour whose weight is the aggregate, meant for selections like min & max
+    def aggregate_vertex(self, u):
+        node = self._vertex_node(u)
+        if node is None: return None
+        node = self._tree.root(node)
+        target = node._aggregate
+        if target is None: return None
+        while True:
+            left = node._left
+            if left is not None and left._aggregate == target: node = left
+            elif node._weight == target: return node.value[0]
+            else: node = node._right
+
+    def _vertex_node(self, v):
+        vertex_id = self._vertex_ids.get(v)
+        return None if vertex_id is None else self._vertex_nodes[vertex_id]
+
+    # Links the acyclic 'edges' among vertices without edges so far, in O(n) for n vertices.
+    # Every tree is toured by an iterative depth first search & its sequence tree built at once,
+    # optionally with all its vertices annotated.
+    def link_forest(self, edges, annotate=False):
+        from collections import defaultdict
 
-    def _get_root(self, u, v):
-        if (u, v) not in self._edge_map: return None
-        current_node = self._get_avl_root(u, v)
-        while current_node._left is not None: current_node = current_node._left
-        return current_node
+        tree, edge_nodes, adjacency = self._tree, self._edge_nodes, defaultdict(list)
+        for u, v in edges:
+            adjacency[u].append(v)
+            adjacency[v].append(u)
+        visited = set()
+        for root in adjacency:
+            if root in visited: continue
+            visited.add(root)
+            root_node = self._vertex_nodes[self._vertex_id(root)]
+            assert root_node._parent is None and root_node._size == 1
+            root_node._annotation = root_node._annotation or annotate
+            tour, stack = [root_node], [(root, self._vertex_ids[root], iter(adjacency[root]))]
+            while stack:
+                u, u_id, neighbours = stack[-1]
+                for v in neighbours:
+                    if v in visited: continue
+                    visited.add(v)
+                    v_id = self._vertex_id(v)
+                    v_node = self._vertex_nodes[v_id]
+                    assert v_node._parent is None and v_node._size == 1
+                    v_node._annotation = v_node._annotation or annotate
+                    down_link = edge_nodes[u_id << 32 | v_id] = tree((u, v))
+                    tour.append(down_link)
+                    tour.append(v_node)
+                    stack.append((v, v_id, iter(adjacency[v])))
+                    break
+                else:
+                    stack.pop()
+                    if stack:
+                        p, p_id, _ = stack[-1]
+                        up_link = edge_nodes[u_id << 32 | p_id] = tree((u, p))
+                        tour.append(up_link)
+            tree.from_sequence(tour)
 
     def set_annotation(self, u, flag):
-        self._insert_node(u)
-        self._edge_map[u, u].set_annotation(flag)
+        self._vertex_nodes[self._vertex_id(u)].set_annotation(flag)
 
     def annotated_nodes(self, u):
-        self._insert_node(u)
-        return list(map(lambda n: n.value[0], self._get_avl_root(u, u).annotated_nodes()))
+        node = self._vertex_node(u)
+        if node is None: return iter(())
+        return (node.value[0] for node in self._tree.root(node).annotated_nodes())
 
     def size(self, u):
-        self._insert_node(u)
-        avl_size = AVLTree.size(self._get_avl_root(u, u))
-        return (avl_size + 1) >> 1
+        node = self._vertex_node(u)
+        # a tour of k vertices holds k vertex nodes & 2 (k - 1) edge nodes
+        return 1 if node is None else (self._tree.root(node)._size + 2) // 3
 
     def get_root(self, u):
-        return None if self._get_root(u, u) is None else self._get_root(u, u).value[0]
+        node = self._vertex_node(u)
+        return None if node is None else self._tree.first(self._tree.root(node)).value[0]
+
+    # Index of the (u, v) entry in its tour, the vertex' own entry by default.
+    # A tour from 'get_root' enters every other vertex first through the edge from its parent.
+    def position(self, u, v=None):
+        node = self._vertex_node(u) if v is None else\
+            self._edge_nodes[self._vertex_ids[u] << 32 | self._vertex_ids[v]]
+        # splay trees bring the node to the root, other backends leave it in place
+        self._tree.root(node)
+        position = SequenceTree.size(node._left)
+        while node._parent is not None:
+            if node._parent._right is node: position += SequenceTree.size(node._parent._left) + 1
+            node = node._parent
+        return position
 
     def linked(self, u, v):
-        return (u, v) in self._edge_map
+        vertex_ids = self._vertex_ids
+        if u not in vertex_ids or v not in vertex_ids: return False
+        # a vertex node stands for the vertex' own (v, v) entry of the tour
+        return u == v or (vertex_ids[u] << 32 | vertex_ids[v]) in self._edge_nodes
 
     def connected(self, u, v):
-        self._insert_node(u)
-        self._insert_node(v)
-        return self._get_root(u, u) is not None and self._get_root(u, u) == self._get_root(v, v)
+        if u == v: return True
+        u_node, v_node = self._vertex_node(u), self._vertex_node(v)
+        if u_node is None or v_node is None: return False
+        return self._tree.same_tree(u_node, v_node)
+
+    def _make_root(self, node):
+        tree = self._tree
+        first = tree.first(tree.root(node))
+        if first is node: return
+        root_node, _ = tree.pop_front(tree.root(first))
+        left, new_root_node, right = tree.split(node)
+        tree.push_front(new_root_node, tree.merge(right, root_node, left))
 
     def make_root(self, v):
-        self._insert_node(v)
-        if self._get_root(v, v).value == (v, v): return
-        root_node, _ = AVLTree.pop_front(self._get_avl_root(v, v))
-        left, new_root_node, right = AVLTree.split(self._edge_map[v, v])
-        AVLTree.push_front(new_root_node, AVLTree.merge(right, root_node, left))
+        self._make_root(self._vertex_nodes[self._vertex_id(v)])
 
     def link(self, u, v):
-        self._insert_node(u)
-        self._insert_node(v)
-        if (u, v) in self._edge_map: return
+        u_id, v_id = self._vertex_id(u), self._vertex_id(v)
+        if u_id == v_id or (u_id << 32 | v_id) in self._edge_nodes: return
         assert not self.connected(u, v)
-        self.make_root(u)
-        self.make_root(v)
-        self._edge_map[u, v] = AVLTree((u, v))
-        self._edge_map[v, u] = AVLTree((v, u))
-        AVLTree.push_back(\
-            AVLTree.merge(\
-                self._get_avl_root(u, u), self._edge_map[u, v], self._get_avl_root(v, v)),\
-            self._get_avl_root(v, u))
+        tree, u_node, v_node = self._tree, self._vertex_nodes[u_id], self._vertex_nodes[v_id]
+        self._make_root(u_node)
+        self._make_root(v_node)
+        down_link, up_link = tree((u, v)), tree((v, u))
+        self._edge_nodes[u_id << 32 | v_id] = down_link
+        self._edge_nodes[v_id << 32 | u_id] = up_link
+        tree.push_back(tree.merge(tree.root(u_node), down_link, tree.root(v_node)), up_link)
 
     def cut(self, u, v):
-        self._insert_node(u)
-        self._insert_node(v)
-        if (u, v) not in self._edge_map: return
-        assert u != v
-        self.make_root(u)
-        left, down_link, _ = AVLTree.split(self._edge_map[u, v])
-        _, up_link, right = AVLTree.split(self._edge_map[v, u])
-        left, mid = AVLTree.pop_back(left)
-        AVLTree.merge(left, mid, right)
-        del self._edge_map[down_link.value]
-        del self._edge_map[up_link.value]
+        if u not in self._vertex_ids or v not in self._vertex_ids: return
+        u_id, v_id = self._vertex_ids[u], self._vertex_ids[v]
+        if u_id == v_id or (u_id << 32 | v_id) not in self._edge_nodes: return
+        tree = self._tree
+        self._make_root(self._vertex_nodes[u_id])
+        left, _, _ = tree.split(self._edge_nodes.pop(u_id << 32 | v_id))
+        _, _, right = tree.split(self._edge_nodes.pop(v_id << 32 | u_id))
+        left, mid = tree.pop_back(left)
+        tree.merge(left, mid, right)
 
     def repr(self):
         result = []
         visited = set()
-        for node in self._edge_map.values():
-            if node.value in visited: continue
-            result.append(AVLTree.inorder(self._get_avl_root(*node.value)))
-            visited = visited.union(result[-1])
+        for node in self._vertex_nodes:
+            root = SequenceTree.root(node)
+            if root.id in visited: continue
+            visited.add(root.id)
+            result.append(self._tree.inorder(root))
         return result
 
     def render(self):
         for tour in self.repr():
             print(tour)
 
-def run_euler_tour_forest_tests():
+def run_euler_tour_forest_tests(tree=None):
     from random import choice, randrange
 
     def validate_structure(euler_tour_forest, forest):
@@ -393,7 +810,7 @@ def run_euler_tour_forest_tests():
 
     l = 1<<10
 
-    euler_tour_forest, forest = EulerTourForest(), dict()
+    euler_tour_forest, forest = EulerTourForest(tree), dict()
     for i in range(l):
         p = randrange(i+1)
         forest[i] = p
@@ -426,19 +843,166 @@ def run_euler_tour_forest_tests():
         forest[i] = i
         validate_structure(euler_tour_forest, forest)
 
-    print('Euler Tour Forest tests finished!')
-
+    print('Euler Tour Forest tests finished!', '(%s)' % (tree or AVLTree).__name__)
+
+def run_euler_tour_forest_benchmark(n=1<<12, ops=1<<14, trees=None):
+    from random import randrange, seed
+    from time import perf_counter
+
+    for tree in trees or [AVLTree, Treap, SplayTree]:
+        # every backend replays the same trace
+        seed(n)
+        euler_tour_forest, parent, start = EulerTourForest(tree), dict(), perf_counter()
+        for i in range(1, n):
+            parent[i] = randrange(i)
+            euler_tour_forest.link(i, parent[i])
+        for _ in range(ops):
+            i = randrange(1, n)
+            if i in parent: euler_tour_forest.cut(i, parent.pop(i))
+            else:
+                # relinking to a smaller vertex keeps the forest acyclic
+                parent[i] = randrange(i)
+                euler_tour_forest.link(i, parent[i])
+            euler_tour_forest.connected(randrange(n), randrange(n))
+        print('Euler Tour Forest (%s): %d link/cut/connected rounds on %d vertices in %.3fs' %\
+            (tree.__name__, ops, n, perf_counter() - start))
+
+def run_level_structure_benchmark(n=1<<9, ops=1<<13, trees=None):
+    from random import randrange, seed
+    from time import perf_counter
+
+    for tree in trees or [AVLTree, Treap, SplayTree]:
+        seed(n)
+        level_structure, edges, start = LevelStructure(tree), [], perf_counter()
+        for _ in range(ops):
+            if edges and randrange(3) == 0:
+                level_structure.cut(*edges.pop(randrange(len(edges))))
+            else:
+                i, j = randrange(n), randrange(n)
+                if i != j and not level_structure._linked(i, j):
+                    edges.append((i, j))
+                    level_structure.link(i, j)
+            level_structure.connected(randrange(n), randrange(n))
+        print('Level Structure (%s): %d link/cut/connected rounds on %d vertices in %.3fs' %\
+            (tree.__name__, ops, n, perf_counter() - start))
+
+# Two cliques of 'n' vertices joined by heavy edges, the lightest link between them is
+# cut & relinked, every cut replaces it by the lightest heavy edge & every link swaps it back
+def run_minimum_spanning_forest_benchmark(n=1<<6, rounds=1<<10, trees=None):
+    from random import randrange, seed
+    from time import perf_counter
+
+    for tree in trees or [AVLTree, Treap, SplayTree]:
+        seed(n)
+        minimum_spanning_forest, start = MinimumSpanningForest(tree), perf_counter()
+        for offset in [0, n]:
+            for i in range(n):
+                for j in range(i): minimum_spanning_forest.link(offset + i, offset + j, randrange(n))
+        for _ in range(n):
+            minimum_spanning_forest.link(randrange(1, n), n + randrange(n), n + randrange(n))
+        linked = perf_counter()
+        for _ in range(rounds):
+            minimum_spanning_forest.link(0, n, -1)
+            minimum_spanning_forest.cut(0, n)
+        print('Minimum Spanning Forest (%s): %d edges linked in %.3fs,' %\
+            (tree.__name__, n * (n - 1) + n, linked - start),
+            '%d bridge link/cut rounds in %.3fs' % (rounds, perf_counter() - linked))
+
+# The level 0 forest keeps component ids & the aggregate of vertex weights under 'aggregate'
 class LevelStructure():
-    def __init__(self):
+    def __init__(self, tree=None, aggregate=None):
         from collections import defaultdict
 
-        self._euler_tour_forests = defaultdict(lambda: EulerTourForest())
+        self._euler_tour_forests = defaultdict(lambda: EulerTourForest(tree))
+        self._euler_tour_forests[0] = EulerTourForest(tree, components=True, aggregate=aggregate)
+        self._component_count = 0
         self._spanning_edges = defaultdict(lambda: defaultdict(lambda: set()))
         self._auxiliary_edges = defaultdict(lambda: defaultdict(lambda: set()))
         self._edge_level = dict()
+        # Union-find shadow of the level 0 forest, valid while the level 0 tours are unchanged.
+        # Links made through it are queued in '_pending_links' & only reach
+        # the Euler tour forests (tours & annotations) on the next cut.
+        self._shadow_parent = dict()
+        self._pending_links = []
+
+    # Vertices enter the shadow lazily, under the first vertex of their level 0 tour
+    def _shadow_find(self, u):
+        parent = self._shadow_parent
+        if u not in parent:
+            root = self._euler_tour_forests[0].get_root(u)
+            if root is None or root == u: parent[u] = u
+            else:
+                parent[u] = root
+                if root not in parent: parent[root] = root
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    # Spanning links among vertices without level 0 edges are toured at once by 'link_forest',
+    # those reaching into existing tours are linked one by one, O(lg n) each.
+    def _materialize(self):
+        if not self._pending_links: return
+        forest = self._euler_tour_forests[0]
+        annotated, spanning_links = set(), []
+        for i, j, spanning in self._pending_links:
+            annotated.add(i)
+            annotated.add(j)
+            if spanning: spanning_links.append((i, j))
+        isolated = {u for u in annotated if forest.size(u) == 1}
+        forest.link_forest([(i, j) for i, j in spanning_links if i in isolated and j in isolated])
+        for i, j in spanning_links:
+            if i not in isolated or j not in isolated: forest.link(i, j)
+        for u in annotated: forest.set_annotation(u, True)
+        # linking re-roots the tours, so the shadow is reseeded from the new tours
+        if any(spanning for _, _, spanning in self._pending_links): self._shadow_parent.clear()
+        self._pending_links = []
 
     def connected(self, i, j):
-        return self._euler_tour_forests[0].connected(i, j)
+        return self._shadow_find(i) == self._shadow_find(j)
+
+    # Builds the structure over 'edges' at once. The links only feed the union-find shadow
+    # & classify the edges, the spanning forest then goes into level 0 through 'link_forest'
+    # with every vertex annotated, instead of one Euler tour link per spanning edge.
+    @classmethod
+    def from_edges(cls, edges, tree=None, aggregate=None):
+        level_structure = cls(tree, aggregate)
+        for i, j in edges: level_structure.link(i, j)
+        forest = level_structure._euler_tour_forests[0]
+        pending_links, level_structure._pending_links = level_structure._pending_links, []
+        forest.link_forest([(i, j) for i, j, spanning in pending_links if spanning], annotate=True)
+        # self loops are the only auxiliary edges which can sit on vertices outside the forest
+        for i, j, _ in pending_links:
+            if i == j: forest.set_annotation(i, True)
+        return level_structure
+
+    def add_vertex(self, u):
+        if self._euler_tour_forests[0].add_vertex(u): self._component_count += 1
+        return self
+
+    def component_count(self):
+        return self._component_count
+
+    def component_id(self, u):
+        self._materialize()
+        return self._euler_tour_forests[0].component_id(u)
+
+    def component_size(self, u):
+        self._materialize()
+        return self._euler_tour_forests[0].size(u)
+
+    def component_members(self, u):
+        self._materialize()
+        return list(self._euler_tour_forests[0].members(u))
+
+    def set_weight(self, u, weight):
+        self.add_vertex(u)
+        self._euler_tour_forests[0].set_weight(u, weight)
+        return self
+
+    def component_aggregate(self, u):
+        self._materialize()
+        return self._euler_tour_forests[0].aggregate(u)
 
     def _linked(self, i, j):
         return (i, j) in self._edge_level
@@ -467,12 +1031,13 @@ class LevelStructure():
         if (not len(self._spanning_edges[l][j])) and (not len(self._auxiliary_edges[l][j])):
             self._euler_tour_forests[l].set_annotation(j, False)
         del self._edge_level[i, j]
-        del self._edge_level[j, i]
+        self._edge_level.pop((j, i), None)
 
     def _cut_auxiliary_edge(self, i, j):
         l = self._edge_level[i, j]
         self._auxiliary_edges[l][i].remove(j)
-        self._auxiliary_edges[l][j].remove(i)
+        # a self loop is stored once
+        self._auxiliary_edges[l][j].discard(i)
         self._update_cut_metadata(l, i, j)
 
     def _cut_spanning_edge(self, i, j):
@@ -483,17 +1048,26 @@ class LevelStructure():
 
     def link(self, i, j):
         if (i, j) in self._edge_level: return self
-        if self._euler_tour_forests[0].connected(i, j): self._link_auxiliary_edge(0, i, j)
-        else:
-            self._link_spanning_edge(0, i, j)
-            self._euler_tour_forests[0].link(i, j)
+        self.add_vertex(i).add_vertex(j)
+        x, y = self._shadow_find(i), self._shadow_find(j)
+        spanning = x != y
+        if spanning:
+            self._shadow_parent[x] = y
+            self._component_count -= 1
+        self._edge_level[i, j] = self._edge_level[j, i] = 0
+        edges = self._spanning_edges[0] if spanning else self._auxiliary_edges[0]
+        edges[i].add(j)
+        edges[j].add(i)
+        self._pending_links.append((i, j, spanning))
         return self
 
     def cut(self, i, j):
         if (i, j) not in self._edge_level: return self
+        self._materialize()
         if self._is_auxiliary_edge(i, j): self._cut_auxiliary_edge(i, j)
         else:
             level = self._edge_level[i, j]
+            self._shadow_parent.clear()
             self._cut_spanning_edge(i, j)
             for l in range(level, -1, -1): self._euler_tour_forests[l].cut(i, j)
             for l in range(level, -1, -1):
@@ -512,9 +1086,11 @@ class LevelStructure():
                             for f in range(1+l): self._euler_tour_forests[f].link(u, v)
                             return self
                         self._link_auxiliary_edge(1+l, u, v)
+            self._component_count += 1
         return self
 
     def render(self):
+        self._materialize()
         print('edge levels')
         print(self._edge_level)
         for l in self._euler_tour_forests:
@@ -527,13 +1103,17 @@ class LevelStructure():
             print(dict(self._auxiliary_edges[l]))
             print()
 
-def run_level_structure_tests():
+def run_level_structure_tests(tree=None):
     from random import randrange
 
     n = 1<<5
 
-    level_structure = LevelStructure()
+    # sum, min & max of the vertex weights at once
+    aggregate = lambda a, b: (a[0] + b[0], min(a[1], b[1]), max(a[2], b[2]))
+    level_structure = LevelStructure(tree, aggregate)
     graph = [set() for _ in range(n)]
+    weights = [randrange(n) for _ in range(n)]
+    for u in range(n): level_structure.set_weight(u, (weights[u], weights[u], weights[u]))
 
     def connected(u, v, visited=None):
         if visited is None: visited = set()
@@ -548,6 +1128,25 @@ def run_level_structure_tests():
         for u in range(n):
             for v in range(u):
                 assert level_structure.connected(u, v) == connected(u, v)
+        components, component_of = set(), dict()
+        for u in range(n):
+            if u in component_of: continue
+            component_of[u], stack = u, [u]
+            while stack:
+                for v in graph[stack.pop()]:
+                    if v not in component_of: component_of[v] = u; stack.append(v)
+        for u in range(n):
+            members = sorted(level_structure.component_members(u))
+            assert members == [v for v in range(n) if component_of[v] == component_of[u]]
+            assert level_structure.component_size(u) == len(members)
+            # one id per component, distinct across components
+            components.add((component_of[u], level_structure.component_id(u)))
+            member_weights = [weights[v] for v in members]
+            assert level_structure.component_aggregate(u) ==\
+                (sum(member_weights), min(member_weights), max(member_weights))
+        assert len(set(map(lambda c: c[0], components))) == len(components)
+        assert len(set(map(lambda c: c[1], components))) == len(components)
+        assert level_structure.component_count() == len(components)
 
     unlinked_edges = [(i, j) for i in range(n) for j in range(i)]
     linked_edges = []
@@ -576,10 +1175,685 @@ def run_level_structure_tests():
     while len(unlinked_edges) > 0: link_and_validate()
     while len(linked_edges) > 0: cut_and_validate()
 
-    print('Level Structure tests finished!')
+    print('Level Structure tests finished!', '(%s)' % (tree or AVLTree).__name__)
+
+# [ Reference ]
+#  Publication : A Data Structure for Dynamic Trees
+#              - Sleator & Tarjan
+
+# Rooted trees as preferred paths in splay trees, with path maxima over edge weights.
+# Edges are nodes of their own, so that the maximum of a path identifies an edge.
+class LinkCutTree():
+    class Node():
+        __slots__ = ('left', 'right', 'parent', 'flip', 'key', 'value', 'best')
+
+        def __init__(self, key=None, value=None):
+            self.left = self.right = self.parent = None
+            self.flip = False
+            self.key, self.value = key, value
+            self.best = None if key is None else self
+
+    def __init__(self):
+        self._vertices = dict()
+        self._edges = dict()
+
+    @staticmethod
+    def _is_root(node):
+        parent = node.parent
+        return parent is None or (parent.left is not node and parent.right is not node)
+
+    @staticmethod
+    def _push(node):
+        if node.flip:
+            node.left, node.right = node.right, node.left
+            if node.left is not None: node.left.flip = not node.left.flip
+            if node.right is not None: node.right.flip = not node.right.flip
+            node.flip = False
+
+    @staticmethod
+    def _update(node):
+        best = node if node.key is not None else None
+        for child in (node.left, node.right):
+            if child is not None and child.best is not None and\
+                (best is None or child.best.key > best.key): best = child.best
+        node.best = best
+
+    @staticmethod
+    def _rotate(node):
+        parent, grandparent = node.parent, node.parent.parent
+        if not LinkCutTree._is_root(parent):
+            if grandparent.left is parent: grandparent.left = node
+            else: grandparent.right = node
+        node.parent = grandparent
+        if parent.left is node:
+            parent.left = node.right
+            if node.right is not None: node.right.parent = parent
+            node.right = parent
+        else:
+            parent.right = node.left
+            if node.left is not None: node.left.parent = parent
+            node.left = parent
+        parent.parent = node
+        LinkCutTree._update(parent)
+        LinkCutTree._update(node)
+
+    @staticmethod
+    def _splay(node):
+        path = [node]
+        while not LinkCutTree._is_root(path[-1]): path.append(path[-1].parent)
+        for ancestor in reversed(path): LinkCutTree._push(ancestor)
+        while not LinkCutTree._is_root(node):
+            parent = node.parent
+            if not LinkCutTree._is_root(parent):
+                grandparent = parent.parent
+                if (grandparent.left is parent) == (parent.left is node): LinkCutTree._rotate(parent)
+                else: LinkCutTree._rotate(node)
+            LinkCutTree._rotate(node)
+
+    # Returns the last node where the path to the root switched preferred paths
+    @staticmethod
+    def _access(node):
+        last, current = None, node
+        while current is not None:
+            LinkCutTree._splay(current)
+            current.right = last
+            LinkCutTree._update(current)
+            last, current = current, current.parent
+        LinkCutTree._splay(node)
+        return last
+
+    @staticmethod
+    def _make_root(node):
+        LinkCutTree._access(node)
+        node.flip = not node.flip
+
+    @staticmethod
+    def _link(u, v):
+        LinkCutTree._make_root(u)
+        u.parent = v
+
+    @staticmethod
+    def _cut(u, v):
+        LinkCutTree._make_root(u)
+        LinkCutTree._access(v)
+        v.left.parent = None
+        v.left = None
+        LinkCutTree._update(v)
+
+    def _vertex(self, u):
+        if u not in self._vertices: self._vertices[u] = LinkCutTree.Node(value=u)
+        return self._vertices[u]
+
+    def link(self, u, v, key):
+        edge = LinkCutTree.Node(key, (u, v))
+        self._edges[u, v] = self._edges[v, u] = edge
+        LinkCutTree._link(self._vertex(u), edge)
+        LinkCutTree._link(edge, self._vertex(v))
+
+    def cut(self, u, v):
+        edge = self._edges.pop((u, v))
+        del self._edges[v, u]
+        LinkCutTree._cut(self._vertices[u], edge)
+        LinkCutTree._cut(edge, self._vertices[v])
+
+    # Edge with the largest key on the tree path between the connected 'u' & 'v', or None
+    def path_max(self, u, v):
+        u, v = self._vertex(u), self._vertex(v)
+        LinkCutTree._make_root(u)
+        LinkCutTree._access(v)
+        return None if v.best is None else v.best.value
+
+    # Neighbour of 'v' on the path to 'root', or None for the root itself
+    def parent(self, root, v):
+        LinkCutTree._make_root(self._vertex(root))
+        node = self._vertex(v)
+        LinkCutTree._access(node)
+        # the edge node right before 'v' on the root path
+        edge = node.left
+        if edge is None: return None
+        LinkCutTree._push(edge)
+        while edge.right is not None:
+            edge = edge.right
+            LinkCutTree._push(edge)
+        LinkCutTree._splay(edge)
+        a, b = edge.value
+        return a if b == v else b
+
+    # Lowest common ancestor of 'u' & 'v' in their tree rooted at 'root'
+    def lca(self, root, u, v):
+        LinkCutTree._make_root(self._vertex(root))
+        LinkCutTree._access(self._vertex(u))
+        return LinkCutTree._access(self._vertex(v)).value
+
+# [ Reference ]
+#  Publication : Poly-Logarithmic Deterministic Fully-Dynamic Algorithms for Connectivity,
+#                Minimum Spanning Tree, 2-Edge, and Biconnectivity
+#              - Holm, de Lichtenberg & Thorup
+
+# Minimum spanning forest of a fixed set of edges under deletions only.
+# 'edges' are (key, u, v) triples with distinct keys, the keys order the edges by weight.
+# As in 'LevelStructure', the tree edges of level at least 'l' form the Euler tour forest 'l'
+# & levels only grow, up to lg n as a side moved up holds at most half of its tree.
+# -> level 'l' tree edges are flagged through vertex annotations in forest 'l'
+# -> level 'l' non-tree edges wait in lazily cleaned per-vertex heaps, the heap tops are
+#    the vertex weights of forest 'l', aggregated by 'min'
+# A deleted tree edge is replaced by searching its smaller side from its level down to 0.
+# On every level the tree edges of the side move up first, then the non-tree edges are
+# tried lightest first & those inside the side move up, the first one leaving the side
+# is the lightest replacement. That holds only without insertions after the initial edges.
+class DecrementalMinimumSpanningForest():
+    def __init__(self, edges, tree=None):
+        from collections import defaultdict
+        from heapq import heapify
+
+        self._euler_tour_forests = defaultdict(lambda: EulerTourForest(tree, aggregate=min))
+        self._ends = dict()
+        self._level = dict()
+        self._non_tree_edges = set()
+        self._tree_edges = defaultdict(lambda: defaultdict(set))
+        self._heaps = defaultdict(lambda: defaultdict(list))
+
+        # Kruskal's algorithm builds the initial forest, every edge starts at level 0
+        parent, tree_edges = dict(), []
+        def find(u):
+            parent.setdefault(u, u)
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            return u
+        for key, u, v in sorted(edges):
+            self._ends[key], self._level[key] = (u, v), 0
+            ru, rv = find(u), find(v)
+            if ru != rv:
+                parent[ru] = rv
+                tree_edges.append((u, v))
+                self._tree_edges[0][u].add(key)
+                self._tree_edges[0][v].add(key)
+            else:
+                self._non_tree_edges.add(key)
+                self._heaps[0][u].append(key)
+                self._heaps[0][v].append(key)
+        forest = self._euler_tour_forests[0]
+        forest.link_forest(tree_edges, annotate=True)
+        for u, heap in self._heaps[0].items():
+            heapify(heap)
+            forest.set_weight(u, heap[0])
+
+    def edges(self):
+        return self._ends.keys()
+
+    def non_tree_edges(self):
+        return self._non_tree_edges
+
+    # Drops invalidated heap tops & publishes the lightest remaining edge as the vertex weight
+    def _refresh(self, l, u):
+        from heapq import heappop
+
+        heap, level, non_tree_edges = self._heaps[l].get(u), self._level, self._non_tree_edges
+        while heap and (level.get(heap[0]) != l or heap[0] not in non_tree_edges): heappop(heap)
+        if heap == []: del self._heaps[l][u]
+        top, forest = heap[0] if heap else None, self._euler_tour_forests[l]
+        if forest.weight(u) != top: forest.set_weight(u, top)
+
+    def _add_non_tree_edge(self, l, key):
+        from heapq import heappush
+
+        self._level[key], forest = l, self._euler_tour_forests[l]
+        for u in self._ends[key]:
+            heappush(self._heaps[l][u], key)
+            weight = forest.weight(u)
+            if weight is None or key < weight: forest.set_weight(u, key)
+
+    def _add_tree_edge(self, l, key):
+        self._level[key] = l
+        for u in self._ends[key]:
+            self._tree_edges[l][u].add(key)
+            self._euler_tour_forests[l].set_annotation(u, True)
+
+    def _remove_tree_edge(self, l, key):
+        for u in self._ends[key]:
+            tree_edges = self._tree_edges[l][u]
+            tree_edges.discard(key)
+            if not tree_edges: self._euler_tour_forests[l].set_annotation(u, False)
+
+    # Deletes the edge, returns the key of the edge replacing it in the forest or None
+    def cut(self, key):
+        l = self._level.pop(key, None)
+        if l is None: return None
+        u, v = self._ends[key]
+        if key in self._non_tree_edges:
+            self._non_tree_edges.remove(key)
+            del self._ends[key]
+            self._refresh(l, u)
+            self._refresh(l, v)
+            return None
+        self._remove_tree_edge(l, key)
+        del self._ends[key]
+        forests = self._euler_tour_forests
+        for i in range(l, -1, -1): forests[i].cut(u, v)
+        for i in range(l, -1, -1):
+            forest = forests[i]
+            x = u if forest.size(u) < forest.size(v) else v
+            for a in forest.annotated_nodes(x):
+                for tree_key in list(self._tree_edges[i][a]):
+                    self._remove_tree_edge(i, tree_key)
+                    self._add_tree_edge(i+1, tree_key)
+                    forests[i+1].link(*self._ends[tree_key])
+            while True:
+                a = forest.aggregate_vertex(x)
+                if a is None: break
+                replacement = self._heaps[i][a][0]
+                b, c = self._ends[replacement]
+                if forest.connected(b, c):
+                    self._add_non_tree_edge(i+1, replacement)
+                    self._refresh(i, b)
+                    self._refresh(i, c)
+                    continue
+                self._non_tree_edges.remove(replacement)
+                self._refresh(i, b)
+                self._refresh(i, c)
+                self._add_tree_edge(i, replacement)
+                for h in range(i+1): forests[h].link(b, c)
+                return replacement
+        return None
+
+# Minimum spanning forest of a weighted graph under edge insertions & deletions,
+# through the reduction of Holm, de Lichtenberg & Thorup to deletions only.
+# -> forest edges are kept in an Euler tour forest (components & sides of a cut)
+#    & in a link-cut tree (heaviest edge on a forest path, lowest common ancestors)
+# -> every non-forest edge has a live copy, a non-tree edge of some structure 'k' out of
+#    the 'DecrementalMinimumSpanningForest' instances, each built over at most 2^k live copies
+#    & rebuilt like a binary counter as copies come in
+# -> a structure also holds the forest compressed to the ends of its copies, every compressed
+#    path is a virtual edge keyed just above the heaviest forest edge on it
+# Deleting a forest edge deletes its copies & the virtual edges over it, the lightest of
+# their replacements leaving the cut takes its place & the others get new live copies.
+# The virtual edges over a forest edge are found in O(lg n) per structure, vertices hold
+# the XOR of the ids of the virtual edges ending at them & a side aggregates them by XOR.
+class MinimumSpanningForest():
+    # bits per structure in the XOR of virtual edge ids
+    VIRTUAL_ID_BITS = 64
+
+    def __init__(self, tree=None):
+        from itertools import count
+        from operator import xor
+
+        self._tree = tree
+        self._euler_tour_forest = EulerTourForest(tree, aggregate=xor)
+        self._link_cut_tree = LinkCutTree()
+        self._weights = dict()
+        # edges are keyed by (weight, id) pairs, virtual edges append their own id
+        self._keys = dict()
+        self._ends = dict()
+        self._edge_ids = count()
+        self._forest_edges = dict()
+        self._forest_weight = 0
+        self._structures = []
+        self._virtual_edges = []
+        self._copies = dict()
+
+    def connected(self, i, j):
+        return self._euler_tour_forest.connected(i, j)
+
+    def weight(self, i, j):
+        return self._weights.get((i, j))
+
+    def forest_weight(self):
+        return self._forest_weight
+
+    def forest_edges(self):
+        return ((i, j, w) for (i, j), w in self._forest_edges.items())
+
+    def _add_forest_edge(self, key):
+        i, j = self._ends[key]
+        self._forest_edges[i, j] = key[0]
+        self._forest_weight += key[0]
+        self._euler_tour_forest.link(i, j)
+        self._link_cut_tree.link(i, j, key)
+
+    # Returns the replacements reported by the structures for the virtual edges over it
+    def _remove_forest_edge(self, key):
+        i, j = self._ends[key]
+        self._forest_weight -= self._forest_edges.pop((i, j))
+        self._euler_tour_forest.cut(i, j)
+        self._link_cut_tree.cut(i, j)
+        # a structure has at most one virtual edge over the forest edge, as its virtual edges
+        # are disjoint paths, so its id is the XOR over a side of the cut
+        virtual_ids, replacements = self._euler_tour_forest.aggregate(i) or 0, []
+        mask = (1 << self.VIRTUAL_ID_BITS) - 1
+        for k in range(len(self._structures)):
+            virtual_id = virtual_ids >> k * self.VIRTUAL_ID_BITS & mask
+            if not virtual_id: continue
+            virtual_key, u, v = self._virtual_edges[k].pop(virtual_id)
+            self._toggle_virtual_ids(k, {virtual_id: (virtual_key, u, v)})
+            replacements.append(self._structures[k].cut(virtual_key))
+        return replacements
+
+    def _toggle_virtual_ids(self, k, virtual_edges):
+        forest, toggles = self._euler_tour_forest, dict()
+        for virtual_id, (_, u, v) in virtual_edges.items():
+            shifted = virtual_id << k * self.VIRTUAL_ID_BITS
+            toggles[u] = toggles.get(u, 0) ^ shifted
+            toggles[v] = toggles.get(v, 0) ^ shifted
+        for u, toggle in toggles.items(): forest.set_weight(u, (forest.weight(u) or 0) ^ toggle or None)
+
+    def _cut_copies(self, key):
+        return [self._structures[k].cut(key) for k in self._copies.pop(key, ())]
+
+    # Replaced live copies, except the new forest edge, get new live copies
+    def _renew_copies(self, replacements, forest_key=None):
+        for key in replacements:
+            if key in self._ends and key != forest_key: self._add_copy(key)
+
+    # Structures '0..k' are merged into structure 'k' for the smallest 'k' that can hold them
+    def _add_copy(self, key):
+        structures, copies, k = self._structures, [key], 0
+        while True:
+            if k == len(structures):
+                structures.append(None)
+                self._virtual_edges.append(dict())
+            if structures[k] is not None: copies.extend(structures[k].non_tree_edges())
+            if len(copies) <= 1 << k: break
+            k += 1
+        for h in range(k+1): self._discard_structure(h)
+        self._build_structure(k, copies)
+
+    def _discard_structure(self, k):
+        structure = self._structures[k]
+        if structure is None: return
+        for key in structure.edges():
+            holders = self._copies.get(key)
+            if holders is None: continue
+            holders.discard(k)
+            if not holders: del self._copies[key]
+        self._toggle_virtual_ids(k, self._virtual_edges[k])
+        self._structures[k], self._virtual_edges[k] = None, dict()
+
+    def _build_structure(self, k, copies):
+        ends, virtual_edges = self._ends, self._virtual_edges[k]
+        edges = [(key,) + ends[key] for key in copies]
+        terminals = {u for key in copies for u in ends[key]}
+        for virtual_id, (u, v) in enumerate(self._compressed_forest(terminals), 1):
+            key = self._keys[self._link_cut_tree.path_max(u, v)] + (virtual_id,)
+            virtual_edges[virtual_id] = (key, u, v)
+            edges.append((key, u, v))
+        self._toggle_virtual_ids(k, virtual_edges)
+        self._structures[k] = DecrementalMinimumSpanningForest(edges, self._tree)
+        for key in copies: self._copies.setdefault(key, set()).add(k)
+
+    # Edges of the forest compressed to 'terminals', as (ancestor, descendant) pairs.
+    # Every tree is rooted at the first vertex of its tour, where a vertex spans the tour from
+    # the edge entering it to the edge leaving it. The terminals in depth first order are closed
+    # under lowest common ancestors of neighbours & then hang from their deepest ancestors.
+    def _compressed_forest(self, terminals):
+        from collections import defaultdict
+
+        forest, link_cut_tree, groups = self._euler_tour_forest, self._link_cut_tree, defaultdict(list)
+        for u in terminals: groups[forest.get_root(u)].append(u)
+        for root, group in groups.items():
+            spans = {root: (-1, float('inf'))}
+            def span(u):
+                if u not in spans:
+                    parent = link_cut_tree.parent(root, u)
+                    spans[u] = (forest.position(parent, u), forest.position(u, parent))
+                return spans[u]
+            group.sort(key=span)
+            group += [link_cut_tree.lca(root, u, v) for u, v in zip(group, group[1:])]
+            ancestors = []
+            for v in sorted(set(group), key=span):
+                while ancestors and spans[ancestors[-1]][1] < spans[v][0]: ancestors.pop()
+                if ancestors: yield ancestors[-1], v
+                ancestors.append(v)
+
+    def link(self, i, j, weight=0):
+        if (i, j) in self._weights: return self
+        self._weights[i, j] = self._weights[j, i] = weight
+        # self loops never join anything, so they stay out of the structures
+        if i == j: return self
+        key = self._keys[i, j] = self._keys[j, i] = (weight, next(self._edge_ids))
+        self._ends[key] = (i, j)
+        if not self.connected(i, j):
+            self._add_forest_edge(key)
+            return self
+        heaviest = self._keys[self._link_cut_tree.path_max(i, j)]
+        if key < heaviest:
+            replacements = self._remove_forest_edge(heaviest)
+            self._add_forest_edge(key)
+            self._renew_copies(replacements)
+            key = heaviest
+        self._add_copy(key)
+        return self
+
+    def cut(self, i, j):
+        if (i, j) not in self._weights: return self
+        del self._weights[i, j]
+        self._weights.pop((j, i), None)
+        if i == j: return self
+        key = self._keys.pop((i, j))
+        del self._keys[j, i]
+        if self._ends[key] not in self._forest_edges:
+            replacements = self._cut_copies(key)
+            del self._ends[key]
+            self._renew_copies(replacements)
+            return self
+        replacements = self._remove_forest_edge(key) + self._cut_copies(key)
+        del self._ends[key]
+        # the lightest edge leaving the cut is among the replacements
+        forest, ends = self._euler_tour_forest, self._ends
+        crossing = [r for r in replacements if r in ends and not forest.connected(*ends[r])]
+        forest_key = min(crossing, default=None)
+        if forest_key is not None: self._add_forest_edge(forest_key)
+        self._renew_copies(replacements, forest_key)
+        return self
+
+def run_level_structure_bulk_tests(tree=None):
+    from random import randrange, shuffle
+
+    n = 1<<6
+
+    edges = [(randrange(n), randrange(n)) for _ in range(n)]
+    edges += [(randrange(n>>1), randrange(n>>1)) for _ in range(n)]
+    built, linked = LevelStructure.from_edges(edges, tree), LevelStructure(tree)
+    for e in edges: linked.link(*e)
+
+    def validate():
+        for u in range(n):
+            for v in range(u):
+                assert built.connected(u, v) == linked.connected(u, v)
+                assert built._euler_tour_forests[0].connected(u, v) == linked.connected(u, v)
+                assert linked._euler_tour_forests[0].connected(u, v) == linked.connected(u, v)
+        assert built.component_count() == linked.component_count()
+        for forest in [built._euler_tour_forests[0], linked._euler_tour_forests[0]]:
+            for tour in forest.repr():
+                for i in range(-1, len(tour)-1):
+                    assert tour[i][1] == tour[i+1][0]
+
+    # the pending links of the linked structure reach its tours in bulk
+    linked._materialize()
+    validate()
+    shuffle(edges)
+    for e in edges:
+        built.cut(*e)
+        linked.cut(*e)
+        validate()
+
+    print('Level Structure bulk tests finished!', '(%s)' % (tree or AVLTree).__name__)
+
+def run_minimum_spanning_forest_tests(tree=None):
+    from random import randrange
+
+    n = 1<<5
+
+    minimum_spanning_forest = MinimumSpanningForest(tree)
+    weights = dict()
+
+    def kruskal_weight():
+        parent = list(range(n))
+        def find(u):
+            while parent[u] != u: u = parent[u]
+            return u
+        total = 0
+        for w, i, j in sorted((w, i, j) for (i, j), w in weights.items()):
+            if find(i) != find(j):
+                parent[find(i)] = find(j)
+                total += w
+        return total
+
+    def validate():
+        forest_edges = list(minimum_spanning_forest.forest_edges())
+        assert sum(map(lambda e: e[2], forest_edges)) == minimum_spanning_forest.forest_weight()
+        assert minimum_spanning_forest.forest_weight() == kruskal_weight()
+        parent = list(range(n))
+        def find(u):
+            while parent[u] != u: u = parent[u]
+            return u
+        for i, j, w in forest_edges:
+            assert weights[min(i, j), max(i, j)] == w
+            assert find(i) != find(j)
+            parent[find(i)] = find(j)
+        for u in range(n):
+            for v in range(u):
+                assert minimum_spanning_forest.connected(u, v) == (find(u) == find(v))
+
+    edges = [(i, j) for i in range(n) for j in range(i)]
+    for _ in range(1<<10):
+        i, j = edges[randrange(len(edges))]
+        if (j, i) in weights:
+            del weights[j, i]
+            minimum_spanning_forest.cut(*((i, j) if randrange(2) else (j, i)))
+        elif randrange(3):
+            weights[j, i] = randrange(n)
+            minimum_spanning_forest.link(i, j, weights[j, i])
+        validate()
+
+    print('Minimum Spanning Forest tests finished!', '(%s)' % (tree or AVLTree).__name__)
+
+# Union-find with union by size & no path compression, so that every union can be undone
+class RollbackUnionFind():
+    def __init__(self):
+        self._parent = dict()
+        self._size = dict()
+        self._history = []
+
+    def find(self, u):
+        parent = self._parent
+        while u in parent: u = parent[u]
+        return u
+
+    def union(self, u, v):
+        u, v = self.find(u), self.find(v)
+        if u == v:
+            self._history.append(None)
+            return False
+        size = self._size
+        if size.get(u, 1) < size.get(v, 1): u, v = v, u
+        self._parent[v] = u
+        size[u] = size.get(u, 1) + size.get(v, 1)
+        self._history.append((u, v))
+        return True
+
+    def checkpoint(self):
+        return len(self._history)
+
+    def rollback(self, checkpoint):
+        while len(self._history) > checkpoint:
+            union = self._history.pop()
+            if union is None: continue
+            u, v = union
+            del self._parent[v]
+            self._size[u] -= self._size.get(v, 1)
+
+# Answers the 'connected' queries of a fully known sequence of operations
+# ('link', i, j), ('cut', i, j) & ('connected', i, j), in O(m log m log n) total.
+# Every edge is alive over an interval of queries, the interval is stored on
+# O(log m) nodes of a segment tree over queries, & a depth first walk of the segment tree
+# applies the edges of each node on entry & rolls them back on exit.
+def offline_connectivity(operations):
+    from collections import defaultdict
+
+    queries, alive, intervals = [], dict(), []
+    for op, i, j in operations:
+        edge = (i, j) if i <= j else (j, i)
+        if op == 'link':
+            if edge not in alive: alive[edge] = len(queries)
+        elif op == 'cut':
+            if edge in alive: intervals.append((alive.pop(edge), len(queries), edge))
+        elif op == 'connected': queries.append((i, j))
+        else: raise ValueError('unknown operation %r' % (op,))
+    for edge, start in alive.items(): intervals.append((start, len(queries), edge))
+    if not queries: return []
+
+    segment_edges = defaultdict(list)
+    for start, end, edge in intervals:
+        if start == end: continue
+        # canonical segment tree nodes covering [start, end), node 1 covers [0, len(queries))
+        stack = [(1, 0, len(queries))]
+        while stack:
+            node, lo, hi = stack.pop()
+            if start <= lo and hi <= end: segment_edges[node].append(edge)
+            else:
+                mid = (lo + hi) >> 1
+                if start < mid: stack.append((node << 1, lo, mid))
+                if mid < end: stack.append((node << 1 | 1, mid, hi))
+
+    union_find, answers = RollbackUnionFind(), [None] * len(queries)
+    stack = [(1, 0, len(queries), None)]
+    while stack:
+        node, lo, hi, checkpoint = stack.pop()
+        if checkpoint is not None:
+            union_find.rollback(checkpoint)
+            continue
+        stack.append((node, lo, hi, union_find.checkpoint()))
+        for edge in segment_edges.get(node, ()): union_find.union(*edge)
+        if hi - lo == 1:
+            i, j = queries[lo]
+            answers[lo] = union_find.find(i) == union_find.find(j)
+        else:
+            mid = (lo + hi) >> 1
+            stack.append((node << 1 | 1, mid, hi, None))
+            stack.append((node << 1, lo, mid, None))
+    return answers
+
+def run_offline_connectivity_tests():
+    from random import randrange
+
+    for n in [2, 5, 1<<4, 1<<6]:
+        level_structure, operations, expected, edges = LevelStructure(), [], [], []
+        for _ in range(n << 4):
+            r = randrange(4)
+            if r == 0 and edges:
+                i, j = edges.pop(randrange(len(edges)))
+                # cutting either orientation of an edge is the same cut
+                if randrange(2): i, j = j, i
+                operations.append(('cut', i, j))
+                level_structure.cut(i, j)
+            elif r == 1:
+                i, j = randrange(n), randrange(n)
+                if i == j or level_structure._linked(i, j): continue
+                edges.append((i, j))
+                operations.append(('link', i, j))
+                level_structure.link(i, j)
+            else:
+                i, j = randrange(n), randrange(n)
+                operations.append(('connected', i, j))
+                expected.append(level_structure.connected(i, j))
+        assert offline_connectivity(operations) == expected
+
+    print('Offline Connectivity tests finished!')
 
 if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['bench']:
+        run_euler_tour_forest_benchmark()
+        run_level_structure_benchmark()
+        run_minimum_spanning_forest_benchmark()
+        sys.exit()
     run_avl_tree_tests()
-    run_euler_tour_forest_tests()
-    run_level_structure_tests()
+    for tree in [AVLTree, Treap, SplayTree]:
+        run_euler_tour_forest_tests(tree)
+        run_level_structure_tests(tree)
+        run_level_structure_bulk_tests(tree)
+        run_minimum_spanning_forest_tests(tree)
+    run_offline_connectivity_tests()
 
@@ -14,8 +14,11 @@ from queue import Queue
 # The function returns total cost in a minimum-cost-matching, assignments, & labels
 def hungarian(cost_matrix):
     n = len(cost_matrix)
-    lx, ly = [0] * n, [0] * n
-    xy, yx = [None] * n, [None] * n
+    return _hungarian(cost_matrix, [0] * n, [0] * n, [None] * n, [None] * n)
+
+# Extends a partial matching to a complete one, the matched edges must be tight under the labels
+def _hungarian(cost_matrix, lx, ly, xy, yx):
+    n = len(cost_matrix)
 
     # Every iteration of the following loop constructs an alternating tree.
     # -> The root is some arbitrary unmatched node in 'X'.
@@ -82,6 +85,7 @@ def hungarian(cost_matrix):
             delta = inf
             for y in range(n):
                 if y not in zys: delta = min(delta, yslack[y])
+            if delta == inf: raise ValueError('no feasible assignment exists')
             for x in zxs: lx[x] += delta
             for y in zys: ly[y] -= delta
             for y in range(n):
@@ -108,7 +112,493 @@ def hungarian(cost_matrix):
             ax, ay = axn, ayn
     return sum(lx) + sum(ly), xy, lx, ly
 
+# Re-solves after the costs in some 'rows' &/or 'cols' changed, starting from a previous solution
+# -> only the changed nodes & their partners become exposed, the rest of the matching stays tight
+# -> the labels of changed nodes are reset to the largest feasible values
+# With 'k' exposed nodes the update costs O(k*n^2) instead of O(n^3)
+def hungarian_update(cost_matrix, solution, rows=(), cols=()):
+    n = len(cost_matrix)
+    _, xy, lx, ly = solution
+    xy, lx, ly, yx = list(xy), list(lx), list(ly), [None] * n
+    for x in range(n):
+        if xy[x] is not None: yx[xy[x]] = x
+
+    for x in rows:
+        if xy[x] is not None: yx[xy[x]], xy[x] = None, None
+    for y in cols:
+        if yx[y] is not None: xy[yx[y]], yx[y] = None, None
+
+    for x in rows: lx[x] = min(cost_matrix[x][y] - ly[y] for y in range(n))
+    for y in cols: ly[y] = min(cost_matrix[x][y] - lx[x] for x in range(n))
+    if inf in lx or inf in ly: raise ValueError('no feasible assignment exists')
+    return _hungarian(cost_matrix, lx, ly, xy, yx)
+
+# [ Reference ]
+#  Publication : An Algorithm for Ranking all the Assignments in Order of Increasing Cost
+#              - Murty
+
+# Generator of the 'k' cheapest assignments as (total, xy) pairs in order of increasing cost.
+# Forbidden pairs may be given as 'inf' costs.
+# Every popped solution partitions its remaining solution space into subproblems:
+# -> subproblem 'i' forbids the 'i'-th free edge of the solution & forces the free edges before it
+# -> it is solved by 'hungarian_update' from the parent's labels & matching, only the row of the
+#    forbidden edge gets exposed, so a subproblem costs O(n^2) instead of O(n^3)
+# The priority queue is trimmed to the number of solutions still to be generated,
+# every entry holds only its constraints & an O(n) solution.
+def k_best_assignments(cost_matrix, k):
+    from heapq import heappush, heappop, nsmallest
+    from itertools import count
+
+    n = len(cost_matrix)
+    if k <= 0: return
+    try: solution = hungarian_update(cost_matrix, (None, [None] * n, [0] * n, [0] * n), range(n))
+    except ValueError: return
+    tie_breaker = count()
+    subproblems = [(solution[0], next(tie_breaker), (), (), solution)]
+
+    for remaining in range(k-1, -1, -1):
+        if not subproblems: return
+        total, _, forced, forbidden, solution = heappop(subproblems)
+        yield total, solution[1]
+        if not remaining: return
+
+        xy, forced_xs = solution[1], {x for x, _ in forced}
+        free_xs = [x for x in range(n) if x not in forced_xs]
+        for i, x in enumerate(free_xs):
+            child_forced = forced + tuple((fx, xy[fx]) for fx in free_xs[:i])
+            child_forbidden = forbidden + ((x, xy[x]),)
+            constrained = _constrain(cost_matrix, child_forced, child_forbidden)
+            try: child = hungarian_update(constrained, solution, rows=[x])
+            except ValueError: continue
+            heappush(subproblems, (child[0], next(tie_breaker), child_forced, child_forbidden, child))
+
+        # entries beyond the number of remaining solutions can never be popped
+        if len(subproblems) > remaining: subproblems = nsmallest(remaining, subproblems)
+
+# Copy of the cost matrix with 'inf' costs for the pairs excluded by forced & forbidden edges
+def _constrain(cost_matrix, forced, forbidden):
+    n = len(cost_matrix)
+    constrained = [list(row) for row in cost_matrix]
+    for x, y in forced:
+        for i in range(n):
+            if i != x: constrained[i][y] = inf
+            if i != y: constrained[x][i] = inf
+    for x, y in forbidden: constrained[x][y] = inf
+    return constrained
+
+# Same contract as 'hungarian', but the per-phase state lives in contiguous numpy arrays.
+# Accepts a numpy array (also memory-mapped) or a list of lists.
+# Only rows of nodes entering the alternating tree are read, all other state is O(n).
+# Rather than a BFS over tight edges, every step extends the alternating tree by the 'y'
+# with minimum slack, so each tree extension is a constant number of vectorized operations:
+# -> one masked argmin for 'delta' & the next 'y'
+# -> one masked shift each for 'lx', 'ly' & the slack of 'y' outside the tree
+# -> one masked minimum to fold the newly added 'x' into the slack
+def hungarian_numpy(cost_matrix):
+    import numpy as np
+
+    # rows get promoted to 'dtype' as they are read, the matrix itself is never converted
+    cost = np.asarray(cost_matrix)
+    dtype = np.float64 if cost.dtype.kind == 'f' else np.int64
+    n = len(cost)
+    big = np.inf if dtype == np.float64 else np.iinfo(dtype).max
+    lx, ly = np.zeros(n, dtype), np.zeros(n, dtype)
+    xy, yx = np.full(n, -1), np.full(n, -1)
+
+    # Every phase matches exactly one new root, matched nodes in 'X' never become exposed again
+    for root in range(n):
+        # visited alternating tree nodes
+        zxs, zys = np.zeros(n, bool), np.zeros(n, bool)
+        zxs[root] = True
+
+        # slack & the alternating tree node 'x' in 'X' for which 'y' has smallest slack
+        yslack = cost[root] - (lx[root] + ly)
+        yslackx = np.full(n, root)
+
+        while True:
+            # 'y' outside the tree with minimum slack, its slack is the label change
+            masked_slack = np.where(zys, big, yslack)
+            y = int(masked_slack.argmin())
+            delta = masked_slack[y]
+            if delta == inf: raise ValueError('no feasible assignment exists')
+            if delta:
+                lx[zxs] += delta
+                ly[zys] -= delta
+                yslack[~zys] -= delta
+
+            # the edge to 'y' is tight now
+            if yx[y] < 0: break # augmenting leaf found in 'Y'
+
+            # add newly reached 'matched' edge to the alternating tree
+            x = yx[y]
+            zys[y], zxs[x] = True, True
+            new_slack = cost[x] - (lx[x] + ly)
+            improved = (new_slack < yslack) & ~zys
+            yslack[improved] = new_slack[improved]
+            yslackx[improved] = x
+
+        # Augmenting path found, flip the alternating matched/unmatched edges
+        # starting at 'y', going up to the root
+        while y >= 0:
+            x = yslackx[y]
+            xy[x], yx[y], y = y, x, xy[x]
+    return (lx.sum() + ly.sum()).item(), xy.tolist(), lx.tolist(), ly.tolist()
+
+# Out-of-core variant for a file holding a raw row-major 'n' x 'n' matrix of 'dtype' values.
+# The file is memory-mapped & read row by row, resident memory stays O(n).
+def hungarian_memmap(path, dtype='int32', n=None):
+    import numpy as np
+    from math import isqrt
+    from os.path import getsize
+
+    dtype, size = np.dtype(dtype), getsize(path)
+    if n is None: n = isqrt(size // dtype.itemsize)
+    if size != n * n * dtype.itemsize: raise ValueError('file does not hold an n x n matrix')
+    return hungarian_numpy(np.memmap(path, dtype, 'r', shape=(n, n)))
+
+# Sparse & rectangular variant with CSR style adjacency for 'n' nodes in 'X' & 'm' nodes in 'Y'
+# -> edges of 'x' are columns[offsets[x]:offsets[x+1]] with costs[offsets[x]:offsets[x+1]]
+# -> missing edges are forbidden pairs
+# Every node of the smaller partition gets matched, else ValueError is raised.
+# The function returns total cost, assignments ('None' for unmatched 'x') & labels
+def hungarian_sparse(offsets, columns, costs, m):
+    n = len(offsets) - 1
+    if n > m:
+        # solve the transposed problem, so that the smaller partition is always 'X'
+        total, yx, ly, lx = hungarian_sparse(*_transpose_csr(offsets, columns, costs, m), n)
+        xy = [None] * n
+        for y, x in enumerate(yx): xy[x] = y
+        return total, xy, lx, ly
+    from heapq import heappush, heappop
+
+    # initial labels are feasible, 'lx[x]' is the cheapest edge of 'x'
+    lx, ly = [0] * n, [0] * m
+    for x in range(n):
+        if offsets[x] == offsets[x+1]: raise ValueError('no full matching exists')
+        lx[x] = min(costs[offsets[x]:offsets[x+1]])
+    xy, yx = [None] * n, [None] * m
+
+    # distances are reduced costs along alternating paths, reset only where touched
+    ydist, yprevx, ydone = [inf] * m, [None] * m, [False] * m
+
+    # Every phase runs Dijkstra over alternating paths from one exposed 'root' in 'X'
+    # -> the work per phase is proportional to the edges incident to the visited nodes in 'X'
+    for root in range(n):
+        xdist, touched, heap = {root: 0}, [], []
+        ay, x, dx = None, root, 0
+        while ay is None:
+            # relax the edges extending from the new 'x', the tree part of 'Y' is final,
+            # float rounding can leave reduced costs slightly negative & re-parent it into a cycle
+            for e in range(offsets[x], offsets[x+1]):
+                y = columns[e]
+                d = dx + costs[e] - lx[x] - ly[y]
+                if not ydone[y] and d < ydist[y]:
+                    if ydist[y] == inf: touched.append(y)
+                    ydist[y], yprevx[y] = d, x
+                    heappush(heap, (d, y))
+
+            # closest 'y' not yet in the alternating tree
+            while heap and ydone[heap[0][1]]: heappop(heap)
+            if not heap:
+                for y in touched: ydist[y], ydone[y] = inf, False
+                raise ValueError('no full matching exists')
+            dy, y = heappop(heap)
+            ydone[y] = True
+            if yx[y] is None: ay = y
+            else: x, dx = yx[y], dy; xdist[x] = dy
+
+        # Update labels so that the alternating tree edges & the augmenting path are tight
+        for x, d in xdist.items(): lx[x] += dy - d
+        for y in touched:
+            if ydone[y] and ydist[y] < dy: ly[y] -= dy - ydist[y]
+            ydist[y], ydone[y] = inf, False
+
+        # flip the alternating matched/unmatched edges starting at 'ay', going up to the root
+        while ay is not None:
+            ax = yprevx[ay]
+            xy[ax], yx[ay], ay = ay, ax, xy[ax]
+    return sum(lx) + sum(ly), xy, lx, ly
+
+def _transpose_csr(offsets, columns, costs, m):
+    n = len(offsets) - 1
+    t_offsets = [0] * (m+1)
+    for y in columns: t_offsets[y+1] += 1
+    for y in range(m): t_offsets[y+1] += t_offsets[y]
+    t_columns, t_costs, fill = [None] * len(columns), [None] * len(columns), t_offsets[:-1]
+    for x in range(n):
+        for e in range(offsets[x], offsets[x+1]):
+            y = columns[e]
+            t_columns[fill[y]], t_costs[fill[y]] = x, costs[e]
+            fill[y] += 1
+    return t_offsets, t_columns, t_costs
+
+# Edge list front end for 'hungarian_sparse', 'edges' is an iterable of (x, y, cost)
+def hungarian_edges(edges, n, m):
+    edges = sorted(edges)
+    offsets = [0] * (n+1)
+    for x, _, _ in edges: offsets[x+1] += 1
+    for x in range(n): offsets[x+1] += offsets[x]
+    return hungarian_sparse(offsets, [e[1] for e in edges], [e[2] for e in edges], m)
+
+# Solves many independent problems, results are returned in input order
+# -> problems of equal size are stacked into 3-D arrays of at most 'chunk_size' problems
+# -> every stack is solved in lockstep by '_hungarian_stack'
+# -> stacks are spread across a pool of 'workers' processes (all cores by default)
+def hungarian_batch(matrices, workers=None, chunk_size=64):
+    import numpy as np
+    from collections import defaultdict
+    from concurrent.futures import ProcessPoolExecutor
+
+    matrices = [np.asarray(cost_matrix) for cost_matrix in matrices]
+    groups = defaultdict(list)
+    for i, cost_matrix in enumerate(matrices): groups[len(cost_matrix)].append(i)
+    chunks = [group[j:j+chunk_size] for group in groups.values()\
+        for j in range(0, len(group), chunk_size)]
+    stacks = [np.stack([matrices[i] for i in chunk]) for chunk in chunks]
+
+    result = [None] * len(matrices)
+    if workers == 1 or len(stacks) <= 1: solutions = map(_hungarian_stack, stacks)
+    else:
+        with ProcessPoolExecutor(workers) as pool: solutions = list(pool.map(_hungarian_stack, stacks))
+    for chunk, chunk_solutions in zip(chunks, solutions):
+        for i, solution in zip(chunk, chunk_solutions): result[i] = solution
+    return result
+
+# Lockstep version of 'hungarian_numpy' over a (b, n, n) stack of cost matrices.
+# Every step extends the alternating trees of all problems which haven't found an augmenting path
+# for the current root, so the per-step interpreter overhead is shared by the whole stack.
+def _hungarian_stack(costs):
+    import numpy as np
+
+    dtype = np.float64 if costs.dtype.kind == 'f' else np.int64
+    costs = costs.astype(dtype, copy=False)
+    b, n = costs.shape[:2]
+    big = np.inf if dtype == np.float64 else np.iinfo(dtype).max
+    problems = np.arange(b)
+    lx, ly = np.zeros((b, n), dtype), np.zeros((b, n), dtype)
+    xy, yx = np.full((b, n), -1), np.full((b, n), -1)
+
+    for root in range(n):
+        zxs, zys = np.zeros((b, n), bool), np.zeros((b, n), bool)
+        zxs[:, root] = True
+        yslack = costs[:, root] - (lx[:, root, None] + ly)
+        yslackx = np.full((b, n), root)
+        ay, active = np.full(b, -1), np.ones(b, bool)
+
+        while True:
+            masked_slack = np.where(zys, big, yslack)
+            y = masked_slack.argmin(1)
+            delta = np.where(active, masked_slack[problems, y], 0)[:, None]
+            if np.isinf(delta).any(): raise ValueError('no feasible assignment exists')
+            lx += delta * zxs
+            ly -= delta * zys
+            yslack -= delta * ~zys
+
+            # problems with a tight edge to an exposed 'y' are done with this root
+            x = yx[problems, y]
+            found = active & (x < 0)
+            ay[found] = y[found]
+            active &= ~found
+            extend = np.flatnonzero(active)
+            if not len(extend): break
+
+            y, x = y[extend], x[extend]
+            zys[extend, y], zxs[extend, x] = True, True
+            new_slack = costs[extend, x] - (lx[extend, x, None] + ly[extend])
+            improved = (new_slack < yslack[extend]) & ~zys[extend]
+            yslack[extend] = np.where(improved, new_slack, yslack[extend])
+            yslackx[extend] = np.where(improved, x[:, None], yslackx[extend])
+
+        # flip all the augmenting paths together, shorter ones drop out as they reach their root
+        path, y = problems, ay
+        while len(path):
+            x = yslackx[path, y]
+            next_y = xy[path, x]
+            xy[path, x], yx[path, y] = y, x
+            path, y = path[next_y >= 0], next_y[next_y >= 0]
+
+    totals = lx.sum(1) + ly.sum(1)
+    return [(totals[i].item(), xy[i].tolist(), lx[i].tolist(), ly[i].tolist()) for i in range(b)]
+
+# [ Reference ]
+#  Publication : The auction algorithm: A distributed relaxation method for the assignment problem
+#              - Bertsekas
+
+# Alternative solver with the same contract as 'hungarian', suited to float costs.
+# Nodes in 'X' bid for nodes in 'Y', raising their prices by the bid margin plus 'eps'.
+# -> all exposed nodes in 'X' bid at once (Jacobi style), so a bidding round is a few array operations
+# -> 'eps' shrinks by 'scaling' per pass down to 'tol / n', every pass reuses the previous prices
+# -> no tightness checks by equality, the final matching costs at most 'tol' more than the optimum
+# By default 'tol' keeps integer costs exact & floats within a relative 1e-9 of the optimum.
+# The labels are feasible, with 'ly' as negated prices, their sum is within 'tol' of the total.
+# Forbidden pairs may be given as 'inf' costs, they are bid on only as a last resort:
+# -> their penalty exceeds the cost difference of any two assignments of allowed pairs
+# -> so an assignment ends up with a forbidden pair only if none without one exists
+def hungarian_auction(cost_matrix, tol=None, scaling=4):
+    import numpy as np
+
+    cost = np.asarray(cost_matrix)
+    n = len(cost)
+    if not n: return 0, [], [], []
+    allowed = np.isfinite(cost)
+    if not allowed.any(1).all(): raise ValueError('no feasible assignment exists')
+    low, high = cost[allowed].min().item(), cost[allowed].max().item()
+    spread = float(high - low)
+    if tol is None: tol = 1e-9 * max(1., spread) if cost.dtype.kind == 'f' else .5
+    benefit, prices = -cost.astype(np.float64), np.zeros(n)
+    benefit[~allowed] = -(high + (n+1) * (spread + tol))
+    eps_final = tol / n
+    eps = max(spread / 2, eps_final)
+
+    while True:
+        xy, yx = np.full(n, -1), np.full(n, -1)
+        while True:
+            bidders = np.flatnonzero(xy < 0)
+            if not len(bidders): break
+
+            # every bidder offers the best object's price plus the margin over its second best
+            values = benefit[bidders] - prices
+            best = values.argmax(1)
+            best_value = values[np.arange(len(bidders)), best]
+            values[np.arange(len(bidders)), best] = -inf
+            second_value = values.max(1) if n > 1 else best_value
+            bids = prices[best] + (best_value - second_value) + eps
+
+            # every object goes to its highest bidder, outbid owners become exposed again
+            order = np.lexsort((-bids, best))
+            won, first = np.unique(best[order], return_index=True)
+            winners = bidders[order[first]]
+            outbid = yx[won]
+            xy[outbid[outbid >= 0]] = -1
+            xy[winners], yx[won] = won, winners
+            prices[won] = bids[order[first]]
+
+        if eps <= eps_final: break
+        eps = max(eps / scaling, eps_final)
+
+    if not allowed[np.arange(n), xy].all(): raise ValueError('no feasible assignment exists')
+    ly = -prices
+    lx = (cost - ly).min(1)
+    return cost[np.arange(n), xy].sum().item(), xy.tolist(), lx.tolist(), ly.tolist()
+
+def run_hungarian_tests():
+    import numpy as np
+    from itertools import permutations
+    from os import remove
+    from random import random, randrange
+    from tempfile import mkstemp
+
+    # brute force over all the assignments of 'X' into 'Y', 'inf' for forbidden pairs
+    def assignment_costs(cost_matrix, m):
+        n = len(cost_matrix)
+        return sorted(sum(cost_matrix[x][p[x]] for x in range(n)) for p in permutations(range(m), n))
+
+    def random_matrix(n, m, forbidden=0):
+        return [[inf if randrange(100) < forbidden else randrange(1<<6) for _ in range(m)]\
+            for _ in range(n)]
+
+    # checks the contract shared by all the solvers, returns the total or 'None' when infeasible
+    def check(cost_matrix, solve, tol=0):
+        n = len(cost_matrix)
+        try: total, xy, lx, ly = solve(cost_matrix)
+        except ValueError: return None
+        assert sorted(xy) == list(range(n))
+        assert total == sum(cost_matrix[x][xy[x]] for x in range(n))
+        assert all(lx[x] + ly[y] <= cost_matrix[x][y] + tol for x in range(n) for y in range(n))
+        assert abs(sum(lx) + sum(ly) - total) <= tol
+        return total
+
+    for n in range(7):
+        for forbidden in [0, 20, 60]:
+            for _ in range(1<<4):
+                cost_matrix = random_matrix(n, n, forbidden)
+                expected = assignment_costs(cost_matrix, n)[0] if n else 0
+                if expected == inf: expected = None
+                assert check(cost_matrix, hungarian) == expected
+                assert check(cost_matrix, hungarian_numpy) == expected
+                assert check(cost_matrix, hungarian_auction, .5) == expected
+                assert check(np.array(cost_matrix, float), hungarian_auction, 1e-6) == expected
+
+                # warm start after changing some rows & columns
+                if expected is None: continue
+                solution = hungarian(cost_matrix)
+                rows = [x for x in range(n) if randrange(3) == 0]
+                cols = [y for y in range(n) if randrange(3) == 0]
+                for x in rows: cost_matrix[x] = [randrange(1<<6) for _ in range(n)]
+                for y in cols:
+                    for x in range(n): cost_matrix[x][y] = randrange(1<<6)
+                expected = assignment_costs(cost_matrix, n)[0]
+                update = lambda c: hungarian_update(c, solution, rows, cols)
+                assert check(cost_matrix, update) == expected
+
+    # k cheapest assignments in order of increasing cost
+    for n in range(1, 6):
+        for forbidden in [0, 30]:
+            cost_matrix = random_matrix(n, n, forbidden)
+            costs = [c for c in assignment_costs(cost_matrix, n) if c < inf]
+            for k in [1, 5, 200]:
+                solutions = list(k_best_assignments(cost_matrix, k))
+                assert [total for total, _ in solutions] == costs[:k]
+                assert len({tuple(xy) for _, xy in solutions}) == len(solutions)
+                for total, xy in solutions: assert total == sum(cost_matrix[x][xy[x]] for x in range(n))
+
+    # sparse & rectangular problems, missing edges are forbidden pairs, integer & float costs
+    for n in range(1, 6):
+        for m in range(1, 6):
+            for forbidden in [0, 30, 70]:
+                integral = random_matrix(n, m, forbidden)
+                fractional = [[c + random() for c in row] for row in integral]
+                for cost_matrix, tol in [(integral, 0), (fractional, 1e-9)]:
+                    transposed = [list(column) for column in zip(*cost_matrix)]
+                    expected = assignment_costs(cost_matrix, m)[0] if n <= m else\
+                        assignment_costs(transposed, n)[0]
+                    edges = [(x, y, c) for x, row in enumerate(cost_matrix)\
+                        for y, c in enumerate(row) if c < inf]
+                    try: total, xy, lx, ly = hungarian_edges(edges, n, m)
+                    except ValueError:
+                        assert expected == inf
+                        continue
+                    assert abs(total - expected) <= tol
+                    matched = [(x, y) for x, y in enumerate(xy) if y is not None]
+                    assert len(matched) == min(n, m) and len({y for _, y in matched}) == len(matched)
+                    assert abs(total - sum(cost_matrix[x][y] for x, y in matched)) <= tol
+                    assert abs(total - sum(lx) - sum(ly)) <= tol
+                    assert all(lx[x] + ly[y] <= c + tol for x, y, c in edges)
+
+    # batches mixing sizes, both in process & across a pool
+    matrices = [random_matrix(n, n) for n in [3, 1, 4, 3, 0, 4, 3] for _ in range(1<<3)]
+    expected = [hungarian(cost_matrix)[0] for cost_matrix in matrices]
+    for workers in [1, 2]:
+        solutions = hungarian_batch(matrices, workers, chunk_size=5)
+        assert [check(cost_matrix, lambda _: solution) for cost_matrix, solution in\
+            zip(matrices, solutions)] == expected
+    try:
+        hungarian_batch([random_matrix(3, 3), [[inf, inf], [1, 2]]], 1)
+        assert False
+    except ValueError: pass
+
+    # memory-mapped matrices
+    for dtype in ['int32', 'float64']:
+        cost_matrix = random_matrix(5, 5)
+        fd, path = mkstemp()
+        try:
+            with open(fd, 'wb') as f: np.array(cost_matrix, dtype).tofile(f)
+            assert check(cost_matrix, lambda _: hungarian_memmap(path, dtype)) ==\
+                assignment_costs(cost_matrix, 5)[0]
+            # sizes not matching an n x n matrix, inferred or given
+            with open(path, 'ab') as f: np.zeros(1, dtype).tofile(f)
+            for n in [None, 5, 6]:
+                try:
+                    hungarian_memmap(path, dtype, n)
+                    assert False
+                except ValueError: pass
+        finally: remove(path)
+
+    print('Hungarian tests finished!')
+
 
-print(hungarian([[4, 2, 5], [5, 3, 4], [6, 0, 7]]))
+if __name__ == "__main__":
+    print(hungarian([[4, 2, 5], [5, 3, 4], [6, 0, 7]]))
+    run_hungarian_tests()
 
 
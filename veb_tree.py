@@ -4,13 +4,94 @@
 #  Streamlined : Divide & Conquer: van Emde Boas Trees
 #              - Demaine (MIT 6.046J Design and Analysis of Algorithms)
 
+from bisect import bisect_left, bisect_right, insort
+
+# Universes of at most 'WORD_BITS' bits are stored as plain int bitmasks instead of nodes.
+# The following helpers operate on a cluster which is either such a bitmask or a 'VebTree'.
+WORD_BITS = 6
+
+def _new_cluster(lg_u):
+    return 0 if lg_u <= WORD_BITS else VebTree(lg_u)
+
+def _is_empty(c):
+    return c == 0 if type(c) is int else c.is_empty()
+
+def _size(c):
+    return c.bit_count() if type(c) is int else c._size
+
+def _min(c):
+    return (c & -c).bit_length() - 1 if type(c) is int else c.mn
+
+def _max(c):
+    return c.bit_length() - 1 if type(c) is int else c.mx
+
+def _member(c, v):
+    return bool(c>>v & 1) if type(c) is int else c.member(v)
+
+def _successor(c, v):
+    if type(c) is not int: return c.successor(v)
+    c = c>>(v+1)<<(v+1)
+    return (c & -c).bit_length() - 1 if c else None
+
+def _predecessor(c, v):
+    if type(c) is not int: return c.predecessor(v)
+    c &= (1<<v) - 1
+    return c.bit_length() - 1 if c else None
+
+def _count_range(c, lo, hi):
+    if type(c) is not int: return c.count_range(lo, hi)
+    return (c>>lo & ((1<<(hi - lo)) - 1)).bit_count()
+
+def _iter(c):
+    if type(c) is not int: return iter(c)
+    return (v for v in range(c.bit_length()) if c>>v & 1)
+
+def _insert(c, v):
+    if type(c) is int: return c | 1<<v
+    c._insert(v)
+    return c
+
+def _delete(c, v):
+    if type(c) is int: return c & ~(1<<v)
+    c._delete(v)
+    return c
+
+def _insert_many(c, vs):
+    if type(c) is not int:
+        c._insert_many(vs)
+        return c
+    for v in vs: c |= 1<<v
+    return c
+
+def _delete_many(c, vs):
+    if type(c) is not int:
+        c._delete_many(vs)
+        return c
+    for v in vs: c &= ~(1<<v)
+    return c
+
+# Bulk operations allocate many nodes & temporary lists at once, which would otherwise trigger
+# repeated cyclic garbage collection passes over the growing tree.
+def _without_gc(f, *args):
+    import gc
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try: return f(*args)
+    finally:
+        if enabled: gc.enable()
+
 class VebTree():
+    # Clusters are allocated on demand in a dict keyed by high bits & freed as soon as they empty,
+    # so the tree takes O(n) space for 'n' keys & works for 32 or 64 bit universes.
+    # For odd 'lg_u', the high half (cluster ids in 'aux') gets the extra bit.
+    # Clusters & 'aux' fitting in 'WORD_BITS' are bitmasks, so the recursion ends there.
     def __init__(self, lg_u):
         self.lg_u = lg_u
         self.mn = self.mx = None
-        if lg_u > 1:
-            self.children = [VebTree(lg_u>>1) for _ in range(0, 1<<(lg_u>>1))]
-            self.aux = VebTree(lg_u>>1)
+        self._size = 0
+        self.children = dict()
+        self.aux = None
 
     def _split_bits(self, v):
         return v>>(self.lg_u>>1), v&((1<<(self.lg_u>>1)) - 1)
@@ -21,19 +102,217 @@ class VebTree():
     def is_empty(self):
         return self.mn == None
 
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, v):
+        return self.member(v)
+
+    def min(self):
+        return self.mn
+
+    def max(self):
+        return self.mx
+
+    def member(self, v):
+        if self.is_empty() or v < self.mn or v > self.mx: return False
+        if v == self.mn or v == self.mx: return True
+        l, r = self._split_bits(v)
+        return l in self.children and _member(self.children[l], r)
+
     def successor(self, v):
         if self.is_empty(): return None
         if v < self.mn: return self.mn
         if v >= self.mx: return None
-        if self.lg_u == 1: return self.mx
         l, r = self._split_bits(v)
-        s = self.children[l].successor(r)
-        if s is not None: return self._merge_bits(l, s)
-        m = self.aux.successor(l)
-        return self._merge_bits(m, self.children[m].mn)
+        if l in self.children:
+            s = _successor(self.children[l], r)
+            if s is not None: return self._merge_bits(l, s)
+        m = _successor(self.aux, l)
+        return self._merge_bits(m, _min(self.children[m]))
+
+    # 'mn' is not stored in the clusters, so it is the fallback when no cluster precedes 'v'
+    def predecessor(self, v):
+        if self.is_empty(): return None
+        if v > self.mx: return self.mx
+        if v <= self.mn: return None
+        l, r = self._split_bits(v)
+        if l in self.children:
+            p = _predecessor(self.children[l], r)
+            if p is not None: return self._merge_bits(l, p)
+        m = None if self.aux is None else _predecessor(self.aux, l)
+        if m is None: return self.mn
+        return self._merge_bits(m, _max(self.children[m]))
+
+    # All keys in increasing order, in O(1) amortized time per key
+    def __iter__(self):
+        if self.is_empty(): return
+        yield self.mn
+        if self.aux is None: return
+        shift = self.lg_u>>1
+        for l in _iter(self.aux):
+            high = l<<shift
+            for r in _iter(self.children[l]): yield high | r
+
+    # Lazily walks the successors of keys in [lo, hi)
+    def iter_range(self, lo, hi):
+        v = lo if self.member(lo) else self.successor(lo)
+        while v is not None and v < hi:
+            yield v
+            v = self.successor(v)
+
+    # Number of keys in [lo, hi)
+    # Clusters entirely within the range contribute their size, only the boundary clusters recurse.
+    def count_range(self, lo, hi):
+        lo, hi = max(lo, 0), min(hi, 1<<self.lg_u)
+        if self.is_empty() or lo >= hi or hi <= self.mn or lo > self.mx: return 0
+        count = 1 if lo <= self.mn else 0
+        if self.aux is None: return count
+        (lo_l, lo_r), (hi_l, hi_r) = self._split_bits(lo), self._split_bits(hi - 1)
+        if lo_l == hi_l:
+            if lo_l in self.children: count += _count_range(self.children[lo_l], lo_r, hi_r + 1)
+            return count
+        if lo_l in self.children:
+            count += _count_range(self.children[lo_l], lo_r, 1<<(self.lg_u>>1))
+        m = _successor(self.aux, lo_l)
+        while m is not None and m < hi_l:
+            count += _size(self.children[m])
+            m = _successor(self.aux, m)
+        if hi_l in self.children: count += _count_range(self.children[hi_l], 0, hi_r + 1)
+        return count
+
+    # Bulk construction from strictly increasing keys, see 'insert_many'
+    # The order is checked in one O(n) pass, so the bounds follow from the first & last keys.
+    @staticmethod
+    def from_sorted(keys, lg_u):
+        keys = list(keys)
+        if any(a >= b for a, b in zip(keys, keys[1:])):
+            raise ValueError("keys are not strictly increasing")
+        if keys and (keys[0] < 0 or keys[-1] >= 1<<lg_u): raise ValueError("insertion out of range")
+        return VebTree._from_sorted(keys, lg_u)
+
+    # Same as 'from_sorted' without the checks, for keys known to be strictly increasing & in range
+    @staticmethod
+    def _from_sorted(keys, lg_u):
+        tree = VebTree(lg_u)
+        if keys: _without_gc(tree._insert_many, keys)
+        return tree
+
+    # Snapshot format, all little-endian:
+    # -> header: magic b'VEBT', u16 format version, u8 lg_u, 1 byte padding, u64 key count
+    # -> body  : sorted keys as u64
+    def save(self, path):
+        from array import array
+        from struct import pack
+        from sys import byteorder
+
+        if self.lg_u > 64: raise ValueError("snapshots hold at most 64 bit keys")
+        keys = array('Q', self)
+        if byteorder == 'big': keys.byteswap()
+        with open(path, 'wb') as f:
+            f.write(pack(SNAPSHOT_HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.lg_u, len(keys)))
+            f.write(keys.tobytes())
+
+    # Maps the snapshot & bulk loads its keys.
+    # With 'readonly', queries are answered straight from the mapped key array instead.
+    @staticmethod
+    def load(path, readonly=False):
+        snapshot = VebTreeSnapshot(path)
+        if readonly: return snapshot
+        try: return VebTree._from_sorted(snapshot.keys.tolist(), snapshot.lg_u)
+        finally: snapshot.close()
+
+    # Keys are grouped by high bits, so every touched cluster & 'aux' get all their keys in one pass
+    # instead of a separate top-down descent per key.
+    def insert_many(self, keys):
+        keys = sorted(set(keys))
+        if not keys: return
+        if keys[0] < 0 or keys[-1] >= 1<<self.lg_u: raise ValueError("insertion out of range")
+        if not self.is_empty(): keys = [v for v in keys if not self.member(v)]
+        if keys: _without_gc(self._insert_many, keys)
+
+    # 'vs' is a non-empty sorted list of distinct keys which are not present yet
+    def _insert_many(self, vs):
+        if len(vs) == 1: return self._insert(vs[0])
+        self._size += len(vs)
+        if self.is_empty():
+            self.mn = self.mx = vs[0]
+            vs = vs[1:]
+        elif vs[0] < self.mn:
+            v, self.mn = self.mn, vs[0]
+            vs = vs[1:]
+            insort(vs, v)
+        if not vs: return
+        self.mx = max(self.mx, vs[-1])
+        low_bits, new_clusters = self.lg_u>>1, []
+        mask, word_clusters = (1<<low_bits) - 1, low_bits <= WORD_BITS
+        i = 0
+        while i < len(vs):
+            l = vs[i]>>low_bits
+            j = bisect_left(vs, (l + 1)<<low_bits, i)
+            c = self.children.get(l)
+            if c is None:
+                c = _new_cluster(low_bits)
+                new_clusters.append(l)
+            if word_clusters:
+                for v in vs[i:j]: c |= 1<<(v & mask)
+            elif j == i + 1: c._insert(vs[i] & mask)
+            else: c._insert_many([v & mask for v in vs[i:j]])
+            self.children[l] = c
+            i = j
+        if new_clusters:
+            if self.aux is None: self.aux = _new_cluster(self.lg_u - low_bits)
+            self.aux = _insert_many(self.aux, new_clusters)
+
+    def delete_many(self, keys):
+        keys = sorted(v for v in set(keys) if self.member(v))
+        if keys: _without_gc(self._delete_many, keys)
+
+    # 'vs' is a non-empty sorted list of distinct keys which are present
+    def _delete_many(self, vs):
+        if len(vs) == 1: return self._delete(vs[0])
+        self._size -= len(vs)
+        if not self._size:
+            self.mn = self.mx = self.aux = None
+            self.children = dict()
+            return
+        delete_mn = vs[0] == self.mn
+        if delete_mn: vs = vs[1:]
+        low_bits, empty_clusters = self.lg_u>>1, []
+        mask, i = (1<<low_bits) - 1, 0
+        while i < len(vs):
+            l = vs[i]>>low_bits
+            j = bisect_left(vs, (l + 1)<<low_bits, i)
+            self.children[l] = _delete_many(self.children[l], [v & mask for v in vs[i:j]])
+            if _is_empty(self.children[l]):
+                del self.children[l]
+                empty_clusters.append(l)
+            i = j
+        if empty_clusters:
+            self.aux = _delete_many(self.aux, empty_clusters)
+            if _is_empty(self.aux): self.aux = None
+
+        # the smallest remaining key moves out of its cluster to replace 'mn'
+        if delete_mn:
+            l = _min(self.aux)
+            r = _min(self.children[l])
+            self.mn = self._merge_bits(l, r)
+            self.children[l] = _delete(self.children[l], r)
+            if _is_empty(self.children[l]):
+                del self.children[l]
+                self.aux = _delete(self.aux, l)
+                if _is_empty(self.aux): self.aux = None
+        if self.aux is None: self.mx = self.mn
+        else:
+            l = _max(self.aux)
+            self.mx = self._merge_bits(l, _max(self.children[l]))
 
     def insert(self, v):
-        if v < 0 or v >= 1<<self.lg_u: raise "insertion out of range"
+        if v < 0 or v >= 1<<self.lg_u: raise ValueError("insertion out of range")
+        if not self.member(v): self._insert(v)
+
+    def _insert(self, v):
+        self._size += 1
         if self.is_empty():
             self.mn = self.mx = v
             return
@@ -41,34 +320,581 @@ class VebTree():
             v, self.mn = self.mn, v
         if v > self.mx:
             self.mx = v
-        if self.lg_u == 1: return
         l, r = self._split_bits(v)
-        if self.children[l].is_empty(): self.aux.insert(l)
-        self.children[l].insert(r)
+        if l not in self.children:
+            self.children[l] = _new_cluster(self.lg_u>>1)
+            if self.aux is None: self.aux = _new_cluster(self.lg_u - (self.lg_u>>1))
+            self.aux = _insert(self.aux, l)
+        self.children[l] = _insert(self.children[l], r)
 
     def delete(self, v):
-        if v < self.mn or v > self.mx: return
+        if self.member(v): self._delete(v)
+
+    def _delete(self, v):
+        self._size -= 1
         if self.mn == self.mx:
             self.mn = self.mx = None
             return
-        if self.lg_u == 1:
-            if v == self.mn: self.mn = self.mx
-            else: self.mx = self.mn
-            return
         if v == self.mn:
-            v = self.mn = self._merge_bits(self.aux.mn, self.children[self.aux.mn].mn)
+            l = _min(self.aux)
+            v = self.mn = self._merge_bits(l, _min(self.children[l]))
         l, r = self._split_bits(v)
-        self.children[l].delete(r)
-        if self.children[l].is_empty(): self.aux.delete(l)
+        self.children[l] = _delete(self.children[l], r)
+        if _is_empty(self.children[l]):
+            del self.children[l]
+            self.aux = _delete(self.aux, l)
+            if _is_empty(self.aux): self.aux = None
         if v == self.mx:
-            if self.aux.is_empty(): self.mx = self.mn
-            else: self.mx = self._merge_bits(self.aux.mx, self.children[self.aux.mx].mx)
+            if self.aux is None: self.mx = self.mn
+            else:
+                l = _max(self.aux)
+                self.mx = self._merge_bits(l, _max(self.children[l]))
 
-if __name__ == "__main__":
-    tree = VebTree(1<<(1<<(1<<1)))
+SNAPSHOT_HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION = '<4sHBxQ', b'VEBT', 1
+
+# Read-only view of a snapshot written by 'VebTree.save'
+# The sorted key array is memory-mapped, queries binary search it in O(log n),
+# so a fresh process serves queries without building the tree.
+class VebTreeSnapshot():
+    def __init__(self, path):
+        from mmap import mmap, ACCESS_READ
+        from struct import calcsize, error, unpack_from
+        from sys import byteorder
+
+        with open(path, 'rb') as f: self._map = mmap(f.fileno(), 0, access=ACCESS_READ)
+        # a file too short for the header is no snapshot either
+        try: magic, version, self.lg_u, count = unpack_from(SNAPSHOT_HEADER, self._map)
+        except error: magic = version = None
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._map.close()
+            raise ValueError("not a version %d VebTree snapshot" % SNAPSHOT_VERSION)
+        offset = calcsize(SNAPSHOT_HEADER)
+        if len(self._map) != offset + 8*count:
+            self._map.close()
+            raise ValueError("VebTree snapshot holds %d bytes of keys, expected %d" %\
+                (len(self._map) - offset, 8*count))
+        self.keys = memoryview(self._map)[offset:offset + 8*count].cast('Q')
+        if byteorder == 'big':
+            from array import array
+
+            keys = array('Q', self.keys)
+            keys.byteswap()
+            self.keys.release()
+            self.keys = keys
+
+    def close(self):
+        if isinstance(self.keys, memoryview): self.keys.release()
+        self._map.close()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, v):
+        return self.member(v)
+
+    def min(self):
+        return self.keys[0] if len(self.keys) else None
+
+    def max(self):
+        return self.keys[-1] if len(self.keys) else None
+
+    def member(self, v):
+        i = bisect_left(self.keys, v)
+        return i < len(self.keys) and self.keys[i] == v
+
+    def successor(self, v):
+        i = bisect_right(self.keys, v)
+        return self.keys[i] if i < len(self.keys) else None
+
+    def predecessor(self, v):
+        i = bisect_left(self.keys, v)
+        return self.keys[i-1] if i else None
+
+    def iter_range(self, lo, hi):
+        for i in range(bisect_left(self.keys, lo), bisect_left(self.keys, hi)): yield self.keys[i]
+
+    def count_range(self, lo, hi):
+        return max(0, bisect_left(self.keys, hi) - bisect_left(self.keys, lo))
+
+# [ Reference ]
+#  Publication : Log-logarithmic worst-case range queries are possible in space Theta(N)
+#              - Willard
+#  Streamlined : Integer Structures: Fusion Trees, X-fast & Y-fast Tries
+#              - Demaine (MIT 6.851 Advanced Data Structures)
+
+# Hash table per prefix length over a set of leaves, which are also kept in a sorted linked list
+# -> every prefix maps to [min, max] of the leaves below it
+# -> the longest present prefix of 'v' is found by binary search over the levels, O(log lg_u)
+# -> insert & delete update all the levels, O(lg_u)
+class _XFastTrie():
+    def __init__(self, lg_u):
+        self.lg_u = lg_u
+        self.levels = [dict() for _ in range(lg_u + 1)]
+        self.prev, self.next = dict(), dict()
+
+    def min(self):
+        return self.levels[0][0][0] if self.levels[0] else None
+
+    def max(self):
+        return self.levels[0][0][1] if self.levels[0] else None
+
+    # largest leaf which is at most 'v'
+    def floor(self, v):
+        if not self.levels[0] or v < 0: return None
+        if v >= 1<<self.lg_u: return self.max()
+        lo, hi = 0, self.lg_u
+        while lo < hi:
+            mid = (lo + hi + 1) >> 1
+            if v>>(self.lg_u - mid) in self.levels[mid]: lo = mid
+            else: hi = mid - 1
+        if lo == self.lg_u: return v
+        mn, mx = self.levels[lo][v>>(self.lg_u - lo)]
+        # only one child of the deepest prefix exists, so its leaves are all below or all above 'v'
+        if v>>(self.lg_u - lo - 1) & 1: return mx
+        return self.prev[mn]
+
+    def insert(self, v):
+        p = self.floor(v)
+        s = self.min() if p is None else self.next[p]
+        self.prev[v], self.next[v] = p, s
+        if p is not None: self.next[p] = v
+        if s is not None: self.prev[s] = v
+        for l in range(self.lg_u + 1):
+            node = self.levels[l].get(v>>(self.lg_u - l))
+            if node is None: self.levels[l][v>>(self.lg_u - l)] = [v, v]
+            elif v < node[0]: node[0] = v
+            elif v > node[1]: node[1] = v
+
+    def delete(self, v):
+        p, s = self.prev.pop(v), self.next.pop(v)
+        if p is not None: self.next[p] = s
+        if s is not None: self.prev[s] = p
+        for l in range(self.lg_u + 1):
+            node = self.levels[l][v>>(self.lg_u - l)]
+            if node[0] == node[1]: del self.levels[l][v>>(self.lg_u - l)]
+            elif node[0] == v: node[0] = s
+            elif node[1] == v: node[1] = p
+
+# Same interface as 'VebTree', in O(n) space & O(log log U) expected time for sparse key sets.
+# Keys live in sorted buckets of about 'lg_u' keys, an x-fast trie indexes the bucket representatives.
+# -> a representative is greater than every key in earlier buckets & at most every key in its bucket,
+#    except in the first bucket, which also takes the keys below its representative
+# -> keys belong to the bucket with the largest representative at most the key, else the first one
+# -> buckets are split & merged when their size leaves [lg_u/2, 2*lg_u], so the O(lg_u) trie
+#    updates are amortized over O(lg_u) operations
+class YFastTrie():
+    def __init__(self, lg_u):
+        self.lg_u = lg_u
+        self._bucket_size = max(2, lg_u)
+        self._representatives = _XFastTrie(lg_u)
+        self._buckets = dict()
+        self._size = 0
+
+    def is_empty(self):
+        return not self._size
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, v):
+        return self.member(v)
+
+    def min(self):
+        return None if self.is_empty() else self._buckets[self._representatives.min()][0]
+
+    def max(self):
+        return None if self.is_empty() else self._buckets[self._representatives.max()][-1]
+
+    # representative of the bucket which 'v' belongs to
+    def _find(self, v):
+        representative = self._representatives.floor(v)
+        return self._representatives.min() if representative is None else representative
+
+    def member(self, v):
+        if self.is_empty(): return False
+        bucket = self._buckets[self._find(v)]
+        i = bisect_left(bucket, v)
+        return i < len(bucket) and bucket[i] == v
+
+    def successor(self, v):
+        if self.is_empty(): return None
+        representative = self._find(v)
+        bucket = self._buckets[representative]
+        i = bisect_right(bucket, v)
+        if i < len(bucket): return bucket[i]
+        representative = self._representatives.next[representative]
+        return None if representative is None else self._buckets[representative][0]
+
+    def predecessor(self, v):
+        if self.is_empty(): return None
+        representative = self._find(v)
+        bucket = self._buckets[representative]
+        i = bisect_left(bucket, v)
+        if i: return bucket[i-1]
+        representative = self._representatives.prev[representative]
+        return None if representative is None else self._buckets[representative][-1]
+
+    def iter_range(self, lo, hi):
+        v = lo if self.member(lo) else self.successor(lo)
+        while v is not None and v < hi:
+            yield v
+            v = self.successor(v)
+
+    def _add_bucket(self, bucket):
+        self._representatives.insert(bucket[0])
+        self._buckets[bucket[0]] = bucket
+
+    def _remove_bucket(self, representative):
+        self._representatives.delete(representative)
+        return self._buckets.pop(representative)
+
+    # Splits an oversized bucket in halves.
+    # The first bucket is re-keyed by its minimum, so the keys below its representative
+    # stay ahead of the new representative.
+    def _split_bucket(self, representative):
+        bucket = self._buckets[representative]
+        if bucket[0] < representative: self._add_bucket(self._remove_bucket(representative))
+        self._add_bucket(bucket[self._bucket_size:])
+        del bucket[self._bucket_size:]
+
+    def insert(self, v):
+        if v < 0 or v >= 1<<self.lg_u: raise ValueError("insertion out of range")
+        if self.is_empty():
+            self._size = 1
+            return self._add_bucket([v])
+        representative = self._find(v)
+        bucket = self._buckets[representative]
+        i = bisect_left(bucket, v)
+        if i < len(bucket) and bucket[i] == v: return
+        bucket.insert(i, v)
+        self._size += 1
+        if len(bucket) > 2*self._bucket_size: self._split_bucket(representative)
+
+    def delete(self, v):
+        if self.is_empty(): return
+        representative = self._find(v)
+        bucket = self._buckets[representative]
+        i = bisect_left(bucket, v)
+        if i == len(bucket) or bucket[i] != v: return
+        del bucket[i]
+        self._size -= 1
+        if not bucket: self._remove_bucket(representative)
+        elif len(bucket) < self._bucket_size>>1:
+            # merge with a neighbour, re-split if the result is too large
+            following = self._representatives.next[representative]
+            if following is None:
+                following, representative = representative, self._representatives.prev[representative]
+                if representative is None: return
+            bucket = self._buckets[representative]
+            bucket.extend(self._remove_bucket(following))
+            if len(bucket) > 2*self._bucket_size: self._split_bucket(representative)
+
+# Runs identical key streams through ordered set implementations & checks that they agree
+def run_ordered_set_benchmark(structures=(VebTree, YFastTrie), lg_u=64, n=1<<17, queries=1<<17):
+    from random import getrandbits, shuffle
+    from time import perf_counter
+
+    keys = list({getrandbits(lg_u) for _ in range(n)})
+    probes = [getrandbits(lg_u) for _ in range(queries)]
+    deletions = keys[::2]
+    shuffle(deletions)
+
+    print('%d keys in a %d bit universe, %d queries' % (len(keys), lg_u, queries))
+    reference = None
+    for structure in structures:
+        timings, answers, s = [], [], structure(lg_u)
+        for name, run in [
+            ('insert', lambda: [s.insert(v) for v in keys]),
+            ('successor', lambda: answers.append([s.successor(v) for v in probes])),
+            ('predecessor', lambda: answers.append([s.predecessor(v) for v in probes])),
+            ('delete', lambda: [s.delete(v) for v in deletions]),
+            ('successor', lambda: answers.append([s.successor(v) for v in probes]))]:
+            start = perf_counter()
+            run()
+            timings.append('%s %.3fs' % (name, perf_counter() - start))
+        if reference is None: reference = answers
+        assert answers == reference
+        print('%-10s' % structure.__name__, ', '.join(timings))
+
+# Priority queue over integer priorities in [0, 2^lg_u)
+# -> the distinct priorities present are kept in a 'VebTree'
+# -> items with equal priority wait in a FIFO bucket
+# -> an item->priority index allows 'decrease_key' & 'remove' of arbitrary items
+# All operations take O(log log U) time.
+class VebPriorityQueue():
+    def __init__(self, lg_u):
+        self._priorities = VebTree(lg_u)
+        self._buckets = dict()
+        self._priority = dict()
+
+    def __len__(self):
+        return len(self._priority)
+
+    def __contains__(self, item):
+        return item in self._priority
+
+    def priority(self, item):
+        return self._priority[item]
+
+    # Re-pushing a queued item moves it to the new priority
+    def push(self, item, priority):
+        from collections import OrderedDict
+
+        if item in self._priority: self.remove(item)
+        if priority not in self._buckets:
+            self._priorities.insert(priority)
+            self._buckets[priority] = OrderedDict()
+        self._buckets[priority][item] = None
+        self._priority[item] = priority
+
+    def peek_min(self):
+        if not self._priority: raise IndexError("peek from empty priority queue")
+        priority = self._priorities.min()
+        return next(iter(self._buckets[priority])), priority
+
+    def pop_min(self):
+        if not self._priority: raise IndexError("pop from empty priority queue")
+        priority = self._priorities.min()
+        bucket = self._buckets[priority]
+        item, _ = bucket.popitem(last=False)
+        del self._priority[item]
+        if not bucket:
+            del self._buckets[priority]
+            self._priorities.delete(priority)
+        return item, priority
+
+    def decrease_key(self, item, priority):
+        if priority > self._priority[item]: raise ValueError("priority can only decrease")
+        self.push(item, priority)
+
+    def remove(self, item):
+        priority = self._priority.pop(item)
+        bucket = self._buckets[priority]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[priority]
+            self._priorities.delete(priority)
+
+# Single source shortest paths over non-negative integer weights
+# 'graph[u]' is an iterable of (v, weight) pairs, the result maps reachable nodes to distances.
+# Priorities are bounded by the longest simple path, unless 'lg_u' says otherwise.
+def veb_dijkstra(graph, source, lg_u=None):
+    if lg_u is None:
+        nodes = graph.keys() if isinstance(graph, dict) else range(len(graph))
+        max_weight = max((w for u in nodes for _, w in graph[u]), default=0)
+        lg_u = max(1, (max_weight * len(nodes)).bit_length())
+    dist, queue = dict(), VebPriorityQueue(lg_u)
+    queue.push(source, 0)
+    while queue:
+        u, d = queue.pop_min()
+        dist[u] = d
+        for v, w in graph[u]:
+            if v in dist: continue
+            if v not in queue: queue.push(v, d + w)
+            elif d + w < queue.priority(v): queue.decrease_key(v, d + w)
+    return dist
+
+def _heapq_dijkstra(graph, source):
+    from heapq import heappush, heappop
+
+    dist, heap = dict(), [(0, source)]
+    while heap:
+        d, u = heappop(heap)
+        if u in dist: continue
+        dist[u] = d
+        for v, w in graph[u]:
+            if v not in dist: heappush(heap, (d + w, v))
+    return dist
+
+def run_priority_queue_benchmark(n=1<<17, m=1<<20, max_weight=1<<6):
+    from random import randrange
+    from time import perf_counter
+
+    graph = [[] for _ in range(n)]
+    for _ in range(m): graph[randrange(n)].append((randrange(n), randrange(max_weight)))
+
+    start = perf_counter()
+    veb_dist = veb_dijkstra(graph, 0)
+    veb_time = perf_counter() - start
+    start = perf_counter()
+    heapq_dist = _heapq_dijkstra(graph, 0)
+    heapq_time = perf_counter() - start
+    assert veb_dist == heapq_dist
+
+    print('dijkstra on', n, 'nodes &', m, 'edges')
+    print('veb priority queue: %.3fs' % veb_time)
+    print('heapq             : %.3fs' % heapq_time)
+
+# Applies 'i'/'d'/'s' commands read from the binary stream 'inp' to 'tree'.
+# Input is read in chunks of 'chunk_size' bytes & split into lines in bulk,
+# successor answers are collected & written to the binary stream 'out' in large batches.
+# Returns the number of commands applied.
+def process_commands(tree, inp, out, chunk_size=1<<20, flush_lines=1<<16):
+    insert, delete, successor = tree.insert, tree.delete, tree.successor
+    pending, answers, ops = b'', [], 0
     while True:
-        o, v = input().split()
-        if o == 'i': tree.insert(int(v))
-        if o == 'd': tree.delete(int(v))
-        if o == 's': print(tree.successor(int(v)))
+        chunk = inp.read(chunk_size)
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop() if chunk else b''
+        for line in lines:
+            command = line.split()
+            if not command: continue
+            o, v = command
+            if o == b'i': insert(int(v))
+            elif o == b'd': delete(int(v))
+            elif o == b's': answers.append(str(successor(int(v))))
+            ops += 1
+        if len(answers) >= flush_lines or not chunk:
+            if answers: out.write(('\n'.join(answers) + '\n').encode())
+            answers = []
+        if not chunk: break
+    out.flush()
+    return ops
+
+def run_veb_tree_tests():
+    from io import BytesIO
+    from os import close, remove
+    from random import randrange, shuffle
+    from tempfile import mkstemp
+
+    # every query is checked against a sorted list of the same keys
+    def check(tree, keys, lg_u):
+        assert len(tree) == len(keys)
+        assert list(tree.iter_range(0, 1<<lg_u)) == keys
+        assert tree.min() == (keys[0] if keys else None)
+        assert tree.max() == (keys[-1] if keys else None)
+        probes = [randrange(1<<lg_u) for _ in range(1<<5)] + keys[:1<<5]
+        probes += [-1, 0, (1<<lg_u) - 1, 1<<lg_u]
+        for v in probes:
+            i, j = bisect_left(keys, v), bisect_right(keys, v)
+            assert tree.member(v) == (i < j)
+            assert tree.successor(v) == (keys[j] if j < len(keys) else None)
+            assert tree.predecessor(v) == (keys[i-1] if i else None)
+        for _ in range(1<<4):
+            lo, hi = sorted(probes[randrange(len(probes))] for _ in range(2))
+            expected = keys[bisect_left(keys, lo):bisect_left(keys, hi)]
+            assert list(tree.iter_range(lo, hi)) == expected
+            if hasattr(tree, 'count_range'): assert tree.count_range(lo, hi) == len(expected)
+
+    # odd universes split unevenly, small ones are bitmasks only
+    for lg_u in [1, 2, 3, 6, 7, 13, 20, 64]:
+        pool = list({randrange(1<<lg_u) for _ in range(1<<7)})
+        for structure in [VebTree, YFastTrie]:
+            tree, keys = structure(lg_u), []
+            for i in range(1<<10):
+                v = pool[randrange(len(pool))]
+                if randrange(3):
+                    tree.insert(v)
+                    if v not in keys: insort(keys, v)
+                else:
+                    tree.delete(v)
+                    if v in keys: keys.remove(v)
+                if i % (1<<7) == 0: check(tree, keys, lg_u)
+            check(tree, keys, lg_u)
+            try:
+                tree.insert(1<<lg_u)
+                assert False
+            except ValueError: pass
+
+        # bulk operations, from unsorted input with duplicates
+        tree, keys = VebTree(lg_u), set()
+        for _ in range(1<<3):
+            batch = [pool[randrange(len(pool))] for _ in range(randrange(1<<6))]
+            if randrange(2):
+                tree.insert_many(batch)
+                keys.update(batch)
+            else:
+                tree.delete_many(batch)
+                keys.difference_update(batch)
+            check(tree, sorted(keys), lg_u)
+        check(VebTree.from_sorted(sorted(keys), lg_u), sorted(keys), lg_u)
+        for unsorted in [sorted(keys)[::-1], [0, 0]]:
+            if len(unsorted) < 2: continue
+            try:
+                VebTree.from_sorted(unsorted, lg_u)
+                assert False
+            except ValueError: pass
+
+        # snapshots, bulk loaded or queried in place
+        fd, path = mkstemp()
+        close(fd)
+        try:
+            tree.save(path)
+            check(VebTree.load(path), sorted(keys), lg_u)
+            snapshot = VebTree.load(path, readonly=True)
+            check(snapshot, sorted(keys), lg_u)
+            snapshot.close()
+            # truncated within the header, within a key & on a key boundary
+            with open(path, 'rb') as f: data = f.read()
+            for size in [1, len(data) - 3, len(data) - 8]:
+                with open(path, 'wb') as f: f.write(data[:size])
+                try:
+                    VebTree.load(path)
+                    assert False
+                except ValueError: pass
+        finally: remove(path)
+
+    # commands split across chunk boundaries & answers flushed in several batches
+    lg_u, keys, commands, answers = 10, [], [], []
+    for _ in range(1<<10):
+        o, v = 'ids'[randrange(3)], randrange(1<<lg_u)
+        commands.append('%s %d' % (o, v))
+        if o == 'i' and v not in keys: insort(keys, v)
+        if o == 'd' and v in keys: keys.remove(v)
+        if o == 's':
+            j = bisect_right(keys, v)
+            answers.append(str(keys[j] if j < len(keys) else None))
+    for chunk_size in [1, 7, 1<<20]:
+        tree, out = VebTree(lg_u), BytesIO()
+        inp = BytesIO(('\n\n'.join(commands) + '\n').encode())
+        assert process_commands(tree, inp, out, chunk_size, flush_lines=1<<4) == len(commands)
+        assert out.getvalue().decode().split() == answers
+        check(tree, keys, lg_u)
+
+    # priority queue order & shortest paths
+    queue, items = VebPriorityQueue(8), list(range(1<<6))
+    shuffle(items)
+    for item in items: queue.push(item, randrange(1<<8))
+    for item in items[::3]: queue.decrease_key(item, queue.priority(item)>>1)
+    for item in items[1::3]: queue.remove(item)
+    popped = [queue.pop_min() for _ in range(len(queue))]
+    assert [p for _, p in popped] == sorted(p for _, p in popped)
+    assert sorted(item for item, _ in popped) == sorted(items[::3] + items[2::3])
+    graph = [[(randrange(1<<6), randrange(1<<4)) for _ in range(4)] for _ in range(1<<6)]
+    assert veb_dijkstra(graph, 0) == _heapq_dijkstra(graph, 0)
+
+    print('VEB Tree tests finished!')
+
+if __name__ == "__main__":
+    import argparse, sys
+    from time import perf_counter
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', nargs='?', choices=['bench', 'bench-sets', 'test'])
+    parser.add_argument('--lg-u', type=int, default=1<<(1<<(1<<1)))
+    parser.add_argument('--stream', action='store_true', help='buffered batch processing of stdin')
+    parser.add_argument('--stats', action='store_true', help='report ops/sec on stderr')
+    args = parser.parse_args()
 
+    if args.command == 'bench':
+        run_priority_queue_benchmark()
+        sys.exit()
+    if args.command == 'bench-sets':
+        run_ordered_set_benchmark()
+        sys.exit()
+    if args.command == 'test':
+        run_veb_tree_tests()
+        sys.exit()
+    tree, ops, start = VebTree(args.lg_u), 0, perf_counter()
+    if args.stream: ops = process_commands(tree, sys.stdin.buffer, sys.stdout.buffer)
+    else:
+        for line in sys.stdin:
+            if not line.split(): continue
+            o, v = line.split()
+            if o == 'i': tree.insert(int(v))
+            if o == 'd': tree.delete(int(v))
+            if o == 's': print(tree.successor(int(v)))
+            ops += 1
+    if args.stats:
+        elapsed = perf_counter() - start
+        print('%d ops in %.3fs, %.0f ops/sec' % (ops, elapsed, ops / max(elapsed, 1e-9)), file=sys.stderr)